@@ -0,0 +1,136 @@
+"""Sync (wsgi.py) vs async (asgi.py) serving, one worker each.
+
+Seeds a database, then starts `gunicorn wsgi -k sync` and `gunicorn
+asgi:application` (uvicorn worker) in turn with a single worker and sends
+the same read requests from --concurrency client threads. The sync worker
+handles one request at a time, the async one keeps many in flight while
+they wait on the database, so the gap grows with the database latency.
+On a local SQLite file nothing waits: --db-latency-ms adds a round trip to
+every statement (see slow_sqlite.py), or run it against Postgres/MySQL.
+
+    python benchmarks/bench_asgi.py --scale 10000 --concurrency 64 --db-latency-ms 5
+    python benchmarks/bench_asgi.py --db-url postgresql://... --output asgi.json
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from common import ROOT, SRC, load_app, seed, percentiles, git_commit
+
+MODES = {
+    'wsgi': ['wsgi', '-k', 'sync'],
+    'asgi': ['asgi:application', '-k', 'uvicorn_worker.UvicornWorker'],
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode, db_url, port, latency_ms):
+    env = dict(os.environ, DATABASE_URL=db_url, BENCH_DB_LATENCY_MS=str(latency_ms))
+    command = [sys.executable, '-m', 'gunicorn', *MODES[mode], '--chdir', SRC,
+               '--workers', '1', '--bind', f'127.0.0.1:{port}', '--log-level', 'warning']
+    if latency_ms:
+        command += ['--config', os.path.join(ROOT, 'benchmarks', 'slow_sqlite.py')]
+    server = subprocess.Popen(command, env=env, cwd=ROOT)
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/healthz').read()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError(f'{mode} server did not start')
+
+
+def make_urls(scale, users, count):
+    from resources import RESOURCES
+    urls = []
+    for i in range(count):
+        resource = RESOURCES[i % len(RESOURCES)]
+        urls.append(random.choice([
+            f'/{resource.plural}?limit=20&after_id={random.randint(0, scale)}',
+            f'/{resource.plural}/{random.randint(1, scale)}',
+            f'/{resource.plural}/top',
+            f'/users/{random.randint(1, users)}/favorites',
+        ]))
+    return urls
+
+
+def run(port, urls, concurrency):
+    def one(url):
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}{url}') as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as error:
+            status = error.code
+        except OSError:
+            status = None  # reset or refused
+        return time.perf_counter() - started, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, urls))
+    elapsed = time.perf_counter() - started
+    return {
+        'requests': len(urls),
+        'errors': sum(1 for _, status in results if status is None or status >= 500),
+        'throughput_rps': len(urls) / elapsed,
+        **percentiles([latency for latency, _ in results]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=int, default=10000)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--db-url', default=None, help='defaults to a throwaway SQLite file')
+    parser.add_argument('--db-latency-ms', type=float, default=0, help='added to every SQLite statement')
+    parser.add_argument('--output', default=None, help='write the results as JSON')
+    args = parser.parse_args()
+
+    random.seed(1)
+    db_url = args.db_url or 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    app = load_app(db_url)
+    users = seed(app, args.scale)
+    urls = make_urls(args.scale, users, args.requests)
+
+    if args.db_latency_ms and not db_url.startswith('sqlite'):
+        parser.error('--db-latency-ms only applies to SQLite')
+
+    report = {'commit': git_commit(), 'scale': args.scale, 'concurrency': args.concurrency,
+              'db_latency_ms': args.db_latency_ms, 'modes': {}}
+    for mode in MODES:
+        port = free_port()
+        server = start_server(mode, db_url, port, args.db_latency_ms)
+        try:
+            run(port, urls[:100], args.concurrency)  # warm up
+            result = report['modes'][mode] = run(port, urls, args.concurrency)
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"{mode}: {result['throughput_rps']:8.1f} req/s  p50 {result['p50_ms']:7.2f}  "
+              f"p99 {result['p99_ms']:7.2f} ms  errors {result['errors']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""`flask catalog export` / `import` throughput and size per format.
+
+Seeds a database, then for each format exports every table and imports
+the export back over it (--replace), reporting rows per minute both ways
+and the size on disk. arrow and parquet are skipped without pyarrow.
+
+    python benchmarks/bench_backup.py --scale 100000
+    python benchmarks/bench_backup.py --formats csv parquet --output backup.json
+"""
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from common import load_app, seed, git_commit
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def per_minute(function, *args, **kwargs):
+    # timed here, not from the report: its per-table seconds are rounded to
+    # 0.01 and add up to 0 on small scales
+    started = time.perf_counter()
+    report = function(*args, **kwargs)
+    elapsed = time.perf_counter() - started
+    rows = sum(table['rows'] for table in report.values())
+    return rows, round(rows / elapsed * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=int, default=100000)
+    parser.add_argument('--formats', nargs='+', default=None, help='default: every format available')
+    parser.add_argument('--db-url', default=None, help='defaults to a throwaway SQLite file')
+    parser.add_argument('--output', default=None, help='write the results as JSON')
+    args = parser.parse_args()
+
+    app = load_app(args.db_url)
+    seed(app, args.scale)
+    from backup import export_catalog, import_catalog, FORMATS
+    has_pyarrow = importlib.util.find_spec('pyarrow') is not None
+    formats = args.formats or [fmt for fmt in FORMATS if fmt in ('csv', 'ndjson') or has_pyarrow]
+
+    report = {'commit': git_commit(), 'scale': args.scale, 'formats': {}}
+    for fmt in formats:
+        directory = os.path.join(tempfile.mkdtemp(), fmt)
+        with app.app_context():
+            rows, export_rate = per_minute(export_catalog, directory, fmt)
+            _, import_rate = per_minute(import_catalog, directory, replace=True)
+        result = report['formats'][fmt] = {
+            'rows': rows, 'export_rows_per_minute': export_rate, 'import_rows_per_minute': import_rate,
+            'size_mb': round(directory_size(directory) / 1024 / 1024, 1),
+        }
+        shutil.rmtree(directory)
+        print(f"{fmt:8} {rows} rows  export {export_rate:>10} rows/min  import {import_rate:>10} rows/min  "
+              f"{result['size_mb']:7.1f} MB")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
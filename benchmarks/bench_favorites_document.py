@@ -0,0 +1,76 @@
+"""GET /users/<id>/favorites with and without materialized documents.
+
+Seeds --users users with --favorites favorites each, then on the first user
+measures the route rebuilt from the tables every time (FAVORITES_DOCUMENTS=off),
+served from its stored document (on), and the first read after a change,
+which rebuilds and stores the document. A favorite POST + DELETE before each
+of those reads is the change; its time is not counted.
+
+    python benchmarks/bench_favorites_document.py --favorites 10000
+    python benchmarks/bench_favorites_document.py --db-url postgresql://... --output document.json
+"""
+import argparse
+import json
+import statistics
+import time
+
+from common import load_app, seed, git_commit
+
+
+def timed(function):
+    started = time.perf_counter()
+    function()
+    return time.perf_counter() - started
+
+
+def summary(samples):
+    return {'median_ms': round(statistics.median(samples) * 1000, 2),
+            'max_ms': round(max(samples) * 1000, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--favorites', type=int, default=10000, help='favorites per user')
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--runs', type=int, default=31)
+    parser.add_argument('--db-url', default=None, help='defaults to a throwaway SQLite file')
+    parser.add_argument('--output', default=None, help='write the results as JSON')
+    args = parser.parse_args()
+
+    app = load_app(args.db_url)
+    from resources import RESOURCES
+    seed(app, args.favorites // len(RESOURCES) * args.users, users=args.users)
+
+    client = app.test_client()
+    url = '/users/1/favorites'
+    body = client.get(url).data
+    # a planet user 1 doesn't have yet
+    planet = max(favorite['planet_id'] for favorite in client.get(url).json['All my favorites']['planets']) + 1
+
+    def change():
+        client.post(f'/users/1/favorites/planets/{planet}')
+        client.delete(f'/users/1/favorites/planets/{planet}')
+
+    def get():
+        assert client.get(url).data == body
+
+    report = {'commit': git_commit(), 'favorites_per_user': args.favorites, 'body_bytes': len(body), 'reads': {}}
+    for name, documents in (('tables', 'off'), ('document', 'on'), ('rebuild', 'on')):
+        app.config['FAVORITES_DOCUMENTS'] = documents
+        get()
+        samples = []
+        for _ in range(args.runs):
+            if name == 'rebuild':
+                change()
+            samples.append(timed(get))
+        result = report['reads'][name] = summary(samples)
+        print(f"{name:9} FAVORITES_DOCUMENTS={documents:4} median {result['median_ms']:8.2f} ms  "
+              f"max {result['max_ms']:8.2f} ms  ({len(body)} bytes)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
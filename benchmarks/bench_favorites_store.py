@@ -0,0 +1,108 @@
+"""The five favorite tables vs the unified `favorites` table (FAVORITES_STORE).
+
+Seeds --users users with --favorites favorites each, spread over the five
+types, in the old tables, times `flask favorites migrate` copying them, then
+for each store measures on the first user: GET /users/<id>/favorites,
+a cross-type count (favorites per type of a user), batch DELETE + POST of
+--batch favorites and a single POST + DELETE.
+
+    python benchmarks/bench_favorites_store.py --favorites 10000
+    python benchmarks/bench_favorites_store.py --db-url postgresql://... --output store.json
+"""
+import argparse
+import json
+import statistics
+import time
+
+from common import load_app, seed, git_commit
+
+STORES = ('legacy', 'dual', 'unified')
+
+
+def median_ms(function, runs):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+    return round(statistics.median(samples) * 1000, 2)
+
+
+def counts_query(user_id):
+    # the cross-type query the old tables need a UNION ALL for
+    from sqlalchemy import select, union_all, literal, func
+    from favorite_store import read_table
+    from models import Favorite
+    from resources import RESOURCES
+    if read_table(RESOURCES[0]).unified:
+        return (select(Favorite.entity_type, func.count()).where(Favorite.user_id == user_id)
+                .group_by(Favorite.entity_type))
+    return union_all(*[select(literal(table.resource.singular), func.count()).where(table.user_id == user_id)
+                       for table in map(read_table, RESOURCES)])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--favorites', type=int, default=10000, help='favorites per user')
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--batch', type=int, default=1000, help='items per batch POST/DELETE (max 1000)')
+    parser.add_argument('--runs', type=int, default=15)
+    parser.add_argument('--db-url', default=None, help='defaults to a throwaway SQLite file')
+    parser.add_argument('--output', default=None, help='write the results as JSON')
+    args = parser.parse_args()
+
+    app = load_app(args.db_url)
+    from models import db
+    from resources import RESOURCES
+    from favorite_store import migrate_favorites
+
+    # seed() gives every user scale / users favorites per type
+    scale = args.favorites // len(RESOURCES) * args.users
+    app.config['FAVORITES_STORE'] = 'legacy'
+    seed(app, scale, users=args.users)
+    with app.app_context():
+        started = time.perf_counter()
+        copied = sum(result['copied'] for result in migrate_favorites().values())
+        elapsed = time.perf_counter() - started
+    report = {'commit': git_commit(), 'favorites_per_user': args.favorites, 'users': args.users,
+              'migrate': {'rows': copied, 'seconds': round(elapsed, 2), 'rows_per_second': round(copied / elapsed)},
+              'stores': {}}
+    print(f"migrate  {copied} rows in {elapsed:.2f} s ({report['migrate']['rows_per_second']} rows/s)")
+
+    client = app.test_client()
+    per_type = max(1, args.batch // len(RESOURCES))
+    for store in STORES:
+        app.config['FAVORITES_STORE'] = store
+        # favorites user 1 already has, so DELETE then POST leaves the data as it was
+        favorites = client.get('/users/1/favorites').json['All my favorites']
+        items = [{'type': resource.singular, 'id': favorite[resource.fk]}
+                 for resource in RESOURCES for favorite in favorites[resource.plural][:per_type]]
+
+        def batch():
+            assert client.delete('/users/1/favorites', json=items).json['deleted'] == len(items)
+            assert client.post('/users/1/favorites', json=items).json['added'] == len(items)
+
+        def one():
+            url = f"/users/1/favorites/{RESOURCES[0].plural}/{items[0]['id']}"
+            assert client.delete(url).status_code == 200 and client.post(url).status_code == 201
+
+        with app.app_context():
+            counts = lambda: db.session.execute(counts_query(1)).all()  # noqa: E731
+            result = report['stores'][store] = {
+                'favorites': sum(len(v) for v in favorites.values()),
+                'get_ms': median_ms(lambda: client.get('/users/1/favorites'), args.runs),
+                'counts_ms': median_ms(counts, args.runs),
+                'batch_delete_post_ms': median_ms(batch, args.runs),
+                'single_delete_post_ms': median_ms(one, args.runs),
+            }
+        print(f"{store:8} {result['favorites']} favorites  GET {result['get_ms']:7.2f} ms  "
+              f"counts {result['counts_ms']:6.2f} ms  batch {len(items)} DELETE+POST "
+              f"{result['batch_delete_post_ms']:7.2f} ms  single DELETE+POST {result['single_delete_post_ms']:5.2f} ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
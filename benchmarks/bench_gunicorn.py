@@ -0,0 +1,118 @@
+"""Memory and throughput of gunicorn configurations, the profile included.
+
+Starts each configuration from the repo root (so gunicorn.conf.py applies,
+overridden through its env vars and flags), sends the same read requests
+from --concurrency client threads and then sums the memory of the master
+and its workers: RSS, and PSS, which splits the pages shared copy-on-write
+between the processes that share them (what preload_app saves).
+
+    python benchmarks/bench_gunicorn.py --scale 10000 --db-latency-ms 2
+    python benchmarks/bench_gunicorn.py --configs sync-1 profile --output gunicorn.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from common import ROOT, load_app, seed, git_commit
+from bench_asgi import free_port, make_urls, run
+
+CORES = multiprocessing.cpu_count()
+
+# name: (env, extra gunicorn arguments)
+CONFIGS = {
+    # what Procfile ran before the profile: `gunicorn wsgi --chdir ./src/`
+    'sync-1': ({'WEB_CONCURRENCY': '1', 'GUNICORN_PRELOAD': 'false'}, ['-k', 'sync']),
+    'sync': ({'WEB_CONCURRENCY': str(2 * CORES + 1), 'GUNICORN_PRELOAD': 'false'}, ['-k', 'sync']),
+    'sync-preload': ({'WEB_CONCURRENCY': str(2 * CORES + 1)}, ['-k', 'sync']),
+    'profile': ({}, []),
+    'profile-asgi': ({'SERVER_MODE': 'asgi'}, []),
+}
+
+
+def processes(pid):
+    pids = [pid]
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        pids += [int(child) for child in f.read().split()]
+    return pids
+
+
+def memory_kb(pid, field):
+    # Rss/Pss lines of smaps_rollup, in kB
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+
+def start(name, db_url, port, latency_ms):
+    overrides, arguments = CONFIGS[name]
+    env = dict(os.environ, DATABASE_URL=db_url, BENCH_DB_LATENCY_MS=str(latency_ms), SERVER_MODE='wsgi')
+    env.update(overrides)
+    command = [sys.executable, '-m', 'gunicorn', *arguments,
+               '--bind', f'127.0.0.1:{port}', '--log-level', 'warning']
+    if latency_ms:
+        command += ['--config', os.path.join(ROOT, 'benchmarks', 'slow_sqlite.py')]
+    server = subprocess.Popen(command, env=env, cwd=ROOT)
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/healthz').read()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError(f'{name} did not start')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=int, default=10000)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--configs', nargs='+', choices=CONFIGS, default=list(CONFIGS))
+    parser.add_argument('--db-url', default=None, help='defaults to a throwaway SQLite file')
+    parser.add_argument('--db-latency-ms', type=float, default=0, help='added to every SQLite statement')
+    parser.add_argument('--output', default=None, help='write the results as JSON')
+    args = parser.parse_args()
+
+    random.seed(1)
+    db_url = args.db_url or 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    if args.db_latency_ms and not db_url.startswith('sqlite'):
+        parser.error('--db-latency-ms only applies to SQLite')
+    app = load_app(db_url)
+    users = seed(app, args.scale)
+    urls = make_urls(args.scale, users, args.requests)
+
+    report = {'commit': git_commit(), 'cores': CORES, 'scale': args.scale, 'concurrency': args.concurrency,
+              'db_latency_ms': args.db_latency_ms, 'configs': {}}
+    for name in args.configs:
+        port = free_port()
+        server = start(name, db_url, port, args.db_latency_ms)
+        try:
+            run(port, urls[:200], args.concurrency)  # warm up every worker
+            result = report['configs'][name] = run(port, urls, args.concurrency)
+            pids = processes(server.pid)
+            result['processes'] = len(pids)
+            result['rss_mb'] = sum(memory_kb(pid, 'Rss') for pid in pids) / 1024
+            result['pss_mb'] = sum(memory_kb(pid, 'Pss') for pid in pids) / 1024
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"{name:13} {result['processes']} procs  RSS {result['rss_mb']:6.1f} MB  "
+              f"PSS {result['pss_mb']:6.1f} MB  {result['throughput_rps']:7.1f} req/s  "
+              f"p99 {result['p99_ms']:7.2f} ms  errors {result['errors']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
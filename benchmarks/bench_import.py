@@ -0,0 +1,77 @@
+"""Cold import time of src/app.py, per APP_FEATURES set.
+
+Imports the app in a fresh interpreter with `python -X importtime` --runs
+times for each feature set and reports the median time of `import app`
+(module imports plus create_app()) and the slowest top-level imports. With
+--max-ms it exits with status 1 when the API-only import goes over the
+budget, so it can run in CI.
+
+    python benchmarks/bench_import.py --runs 7
+    python benchmarks/bench_import.py --max-ms 900 --output import.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from common import SRC, git_commit
+
+# APP_FEATURES value: everything (the default), API-only
+FEATURE_SETS = {'all': 'admin,migrate', 'api': 'none'}
+
+
+def import_times(features, db_url):
+    """{module: cumulative microseconds} of one `import app`."""
+    env = dict(os.environ, APP_FEATURES=features, DATABASE_URL=db_url)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'],
+                            cwd=SRC, env=env, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        # two spaces of indentation per level, level 1 = imported by app.py
+        depth = (len(name) - len(name.lstrip())) // 2
+        if name.strip() == 'app' or depth == 1:
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=8, help='slowest imports to report')
+    parser.add_argument('--max-ms', type=float, default=None, help='budget for the API-only import')
+    parser.add_argument('--output', default=None, help='write the results as JSON')
+    args = parser.parse_args()
+
+    db_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    report = {'commit': git_commit(), 'runs': args.runs, 'feature_sets': {}}
+    for name, features in FEATURE_SETS.items():
+        runs = [import_times(features, db_url) for _ in range(args.runs)]
+        modules = {module: statistics.median(run.get(module, 0) for run in runs) / 1000
+                   for module in runs[0] if module != 'app'}
+        slowest = sorted(modules.items(), key=lambda item: -item[1])[:args.top]
+        result = report['feature_sets'][name] = {
+            'app_features': features,
+            'import_ms': statistics.median(run['app'] for run in runs) / 1000,
+            'slowest_ms': dict(slowest),
+        }
+        print(f"{name:4} APP_FEATURES={features:14} import app {result['import_ms']:7.1f} ms  "
+              + ", ".join(f'{module} {ms:.0f}' for module, ms in slowest))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    api_ms = report['feature_sets']['api']['import_ms']
+    if args.max_ms is not None and api_ms > args.max_ms:
+        print(f'FAIL: API-only import took {api_ms:.1f} ms, budget {args.max_ms:.0f} ms')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""Insert throughput of POST /planets on a large `planets` table.
+
+Seeds N planets, then times M more POST /planets requests with new names and
+M with names that already exist (in a different case). Duplicate detection
+relies on the unique lower(name) index, so throughput should not drop as the
+table grows.
+
+    python benchmarks/bench_name_inserts.py --rows 100000 --inserts 2000
+"""
+import argparse
+import time
+
+from common import load_app
+
+
+def planet(name):
+    return {'name': name, 'diameter': 1, 'gravity': 1.0, 'population': 1,
+            'terrain': 'desert', 'climate': 'arid'}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--inserts', type=int, default=2000)
+    args = parser.parse_args()
+
+    app = load_app()
+    from models import db, Planet
+
+    with app.app_context():
+        db.session.execute(Planet.__table__.insert(),
+                           [planet(f'planet-{i}') for i in range(args.rows)])
+        db.session.commit()
+
+    client = app.test_client()
+    for label, names in (('new', [f'new-planet-{i}' for i in range(args.inserts)]),
+                         ('duplicate', [f'PLANET-{i}' for i in range(args.inserts)])):
+        started = time.perf_counter()
+        statuses = set()
+        for name in names:
+            statuses.add(client.post('/planets', json=planet(name)).status_code)
+        elapsed = time.perf_counter() - started
+        print(f'{label:>9}: {args.inserts / elapsed:,.0f} requests/s '
+              f'on {args.rows:,} rows (status {sorted(statuses)})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Keyset pagination latency on a large `planets` table.
+
+Seeds a throwaway SQLite database with N planets and times
+GET /planets?after_id=X&limit=100 at the start, middle and end of the table.
+With keyset pagination the three numbers should be about the same. Then
+times the first page of a few sorted and filtered listings, which walk a
+(column, id) index instead of sorting the table.
+
+    python benchmarks/bench_pagination.py --rows 1000000
+"""
+import argparse
+import time
+
+from common import load_app
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    app = load_app()
+    from models import db, Planet
+
+    with app.app_context():
+        chunk = 50000
+        for start in range(0, args.rows, chunk):
+            rows = [{'name': f'planet-{i}', 'diameter': i % 20000, 'gravity': 1.0,
+                     'population': i, 'terrain': 'desert', 'climate': 'arid'}
+                    for i in range(start, min(start + chunk, args.rows))]
+            db.session.execute(Planet.__table__.insert(), rows)
+        db.session.commit()
+
+    client = app.test_client()
+    for label, after_id in (('start', 0), ('middle', args.rows // 2), ('end', args.rows - args.limit - 1)):
+        url = f'/planets?after_id={after_id}&limit={args.limit}'
+        client.get(url)
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            response = client.get(url)
+        elapsed = (time.perf_counter() - started) / args.repeat
+        print(f'{label:>6} after_id={after_id:<8} {elapsed * 1000:.2f} ms/request ({response.status_code})')
+
+    for url in (f'/planets?sort=-population&limit={args.limit}',
+                f'/planets?sort=name&population__gt={args.rows // 2}&limit={args.limit}',
+                f'/planets?gravity__between=0.5,1.5&diameter__lt=100&limit={args.limit}'):
+        client.get(url)
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            response = client.get(url)
+        elapsed = (time.perf_counter() - started) / args.repeat
+        print(f'{url:<62} {elapsed * 1000:.2f} ms/request ({response.status_code})')
+
+
+if __name__ == '__main__':
+    main()
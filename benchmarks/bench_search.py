@@ -0,0 +1,46 @@
+"""GET /search latency on a large catalog.
+
+Seeds N planets and people (the FTS index is filled by its triggers) and
+times a rare-name lookup, a prefix query, an attribute filter and a text
+query combined with a filter, each with its facet counts.
+
+    python benchmarks/bench_search.py --rows 1000000
+"""
+import argparse
+import time
+
+from common import load_app, fake_row, insert_rows
+
+QUERIES = [
+    '/search?q=planets-123457',
+    '/search?q=plan&type=planets&limit=20',
+    '/search?type=people&gender=male',
+    '/search?q=desert&type=planets&climate=arid',
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app = load_app()
+    from models import Planet, Person
+
+    with app.app_context():
+        for table in (Planet.__table__, Person.__table__):
+            insert_rows(table, args.rows, lambda i, table=table: fake_row(table, i))
+
+    client = app.test_client()
+    for url in QUERIES:
+        client.get(url)
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            response = client.get(url)
+        elapsed = (time.perf_counter() - started) / args.repeat
+        print(f'{url:<48} {elapsed * 1000:8.2f} ms/request ({response.status_code})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""ORM serialization vs column tuples + row encoder + orjson, on 100k planets.
+
+Times building the JSON body for the whole table both ways:
+
+- orm: Planet.query.all(), Resource.serialize() per instance, Flask's default json
+- columns: Core select of the columns, row_encoder(), the app's JSON provider
+  (orjson when it is installed)
+
+    python benchmarks/bench_serializers.py --rows 100000
+"""
+import argparse
+import time
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import select
+
+from common import load_app, insert_rows, fake_row
+
+
+def timed(label, rows, repeat, fn):
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        size = len(fn())
+    elapsed = (time.perf_counter() - started) / repeat
+    print(f'{label:>8}: {elapsed * 1000:9.1f} ms  {rows / elapsed:12,.0f} rows/s  {size:,} bytes')
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = load_app()
+    from models import db
+    from resources import RESOURCES_BY_NAME
+    from serializers import row_encoder
+
+    planets = RESOURCES_BY_NAME['planets']
+    Planet = planets.model
+
+    default_json = DefaultJSONProvider(app)
+    columns = list(Planet.__table__.columns)
+    encode = row_encoder(columns)
+
+    with app.app_context():
+        insert_rows(Planet.__table__, args.rows, lambda i: fake_row(Planet.__table__, i))
+
+        def orm():
+            body = default_json.dumps([planets.serialize(planet) for planet in Planet.query.all()],
+                                      separators=(",", ":"))
+            db.session.expunge_all()
+            return body
+
+        def column_tuples():
+            return app.json.dumps(encode(db.session.execute(select(*columns)).all()))
+
+        print(f'{args.rows:,} planets, JSON provider: {type(app.json).__name__}')
+        orm_time = timed('orm', args.rows, args.repeat, orm)
+        column_time = timed('columns', args.rows, args.repeat, column_tuples)
+        print(f' speedup: {orm_time / column_time:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
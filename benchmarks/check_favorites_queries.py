@@ -0,0 +1,81 @@
+"""Query-count regression check for GET, POST and DELETE /users/<id>/favorites.
+
+Seeds a user with N favorites spread over the five favorite types and counts
+the SQL statements the routes execute: reading them all, then removing and
+adding them back in one batch each. Exits with status 1 if a count goes over
+its bound, so it can run in CI.
+
+    python benchmarks/check_favorites_queries.py --favorites 500
+
+The batches take at most bulk.MAX_FAVORITE_ITEMS (1000) favorites.
+"""
+import argparse
+import sys
+
+from sqlalchemy import event
+
+from common import load_app
+
+# ETag version lookup + the user + one UNION ALL for the favorites (or
+# the document)
+MAX_QUERIES = 3
+# batches, whatever the number of items: the user + per type the lookup, the
+# write, the ids (POST only), three for the counters and one more with
+# FAVORITES_STORE=dual + the ETag version
+MAX_BATCH_QUERIES = 1 + 5 * 7 + 1
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--favorites', type=int, default=500)
+    args = parser.parse_args()
+
+    app = load_app()
+    from models import db, User
+    from resources import RESOURCES
+    from favorite_store import write_tables
+    from favorite_documents import documents_enabled, favorites_document
+    from favorites import favorites_version_key
+    from etags import get_version
+
+    per_type = max(1, args.favorites // len(RESOURCES))
+    with app.app_context():
+        db.session.add(User(username='bench', email='bench@example.com', password='x'))
+        db.session.flush()
+        for resource in RESOURCES:
+            db.session.execute(resource.model.__table__.insert(),
+                               [{'name': f'{resource.table}-{i}'} for i in range(per_type)])
+            for table in write_tables(resource):
+                db.session.execute(table.model.__table__.insert(),
+                                   [table.values(1, i + 1) for i in range(per_type)])
+        db.session.commit()
+        if documents_enabled(app):
+            # FAVORITES_DOCUMENTS=on: the stored document is served, not built
+            favorites_document(1, get_version(favorites_version_key(1)))
+
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute',
+                     lambda *a, **kw: statements.append(a[2]))
+
+    client = app.test_client()
+    response = client.get('/users/1/favorites')
+    total = sum(len(v) for v in response.json['All my favorites'].values())
+    print(f'GET    {total} favorites -> {len(statements)} queries (max {MAX_QUERIES})')
+    failed = response.status_code != 200 or len(statements) > MAX_QUERIES
+
+    items = [{'type': resource.singular, 'id': i + 1} for resource in RESOURCES for i in range(per_type)]
+    for method, status in (('DELETE', 'deleted'), ('POST', 'added')):
+        statements.clear()
+        response = client.open('/users/1/favorites', method=method, json=items)
+        if response.status_code != 200:
+            print(f'{method:6} {response.status_code} {response.json}')
+            sys.exit(1)
+        print(f'{method:6} {response.json[status]} favorites -> {len(statements)} queries (max {MAX_BATCH_QUERIES})')
+        failed |= response.json[status] != len(items) or len(statements) > MAX_BATCH_QUERIES
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
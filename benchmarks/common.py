@@ -0,0 +1,102 @@
+"""Shared helpers for the benchmark scripts: app loading, seeding, stats."""
+import os
+import subprocess
+import sys
+import tempfile
+
+from sqlalchemy import Integer, Float, String
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+SRC = os.path.join(ROOT, 'src')
+
+WORDS = ['arid', 'temperate', 'frozen', 'urban', 'desert', 'forest', 'ocean', 'swamp',
+         'blue', 'brown', 'green', 'red', 'none', 'varied', 'male', 'female']
+
+CHUNK_SIZE = 50000
+
+
+def load_app(db_url=None):
+    """Import the Flask app against `db_url` (a throwaway SQLite file by default)."""
+    if db_url is None:
+        db_url = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ['DATABASE_URL'] = db_url
+    if SRC not in sys.path:
+        sys.path.insert(0, SRC)
+    from app import app
+    from models import db
+    from search import create_search_index
+    with app.app_context():
+        db.create_all()
+        create_search_index(db.engine)
+    return app
+
+
+def fake_row(table, i):
+    # deterministic values based on the column type, unique names
+    row = {}
+    for column in table.columns:
+        if column.primary_key:
+            continue
+        if column.name == 'name':
+            row['name'] = f'{table.name}-{i}'
+        elif column.foreign_keys:
+            continue
+        elif isinstance(column.type, Integer):
+            row[column.name] = (i * 7919) % 1000000
+        elif isinstance(column.type, Float):
+            row[column.name] = (i % 300) / 100
+        elif isinstance(column.type, String):
+            row[column.name] = WORDS[(i + len(column.name)) % len(WORDS)]
+    return row
+
+
+def insert_rows(table, count, make_row):
+    from models import db
+    for start in range(0, count, CHUNK_SIZE):
+        db.session.execute(table.insert(),
+                           [make_row(i) for i in range(start, min(start + CHUNK_SIZE, count))])
+    db.session.commit()
+
+
+def seed(app, scale, users=None):
+    """`scale` rows in every catalog table, `users` users and `scale` favorites per type."""
+    from models import db, User
+    from resources import RESOURCES
+    from popularity import rebuild_favorite_counts
+    from favorite_store import write_tables
+
+    users = users or max(1, scale // 10)
+    with app.app_context():
+        for resource in RESOURCES:
+            table = resource.model.__table__
+            insert_rows(table, scale, lambda i, t=table: fake_row(t, i))
+        insert_rows(User.__table__, users, lambda i: {
+            'username': f'user-{i}', 'email': f'user-{i}@example.com', 'password': 'x'})
+        for resource in RESOURCES:
+            # (i % users, i // users) never repeats, so the pairs stay unique
+            for table in write_tables(resource):
+                insert_rows(table.model.__table__, min(scale, users * scale), lambda i, table=table: table.values(
+                    i % users + 1, (i // users) % scale + 1))
+            rebuild_favorite_counts(resource)
+        db.session.commit()
+    return users
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    if not samples:
+        return {}
+
+    def at(p):
+        return samples[min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))]
+
+    return {'p50_ms': at(50) * 1000, 'p95_ms': at(95) * 1000, 'p99_ms': at(99) * 1000,
+            'max_ms': samples[-1] * 1000, 'mean_ms': sum(samples) / len(samples) * 1000}
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,207 @@
+"""Load test for every API route.
+
+Seeds a database at the given scale, then sends --requests requests to each
+route from --concurrency threads, either through the Flask test client or
+against a running server (--target http://127.0.0.1:3000, which must use the
+same --db-url). Prints p50/p95/p99 latency and throughput per route and
+writes them as JSON so runs can be diffed across commits.
+
+    python benchmarks/load.py --scale 1000 --requests 200 --output bench_output.json
+    python benchmarks/load.py --scale 100000 --routes planets people
+"""
+import argparse
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from common import load_app, seed, fake_row, percentiles, git_commit
+
+METHODS = ('GET', 'POST', 'DELETE')
+SKIP_PREFIXES = ('/admin', '/static')
+# items per bulk create and per batch favorites request
+BATCH_ITEMS = 10
+
+
+class TestClientDriver:
+    def __init__(self, app):
+        self.app = app
+        self.local = threading.local()
+
+    def request(self, method, url, body):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = self.app.test_client()
+        response = client.open(url, method=method, json=body)
+        response.close()
+        return response.status_code
+
+
+class HTTPDriver:
+    def __init__(self, target):
+        self.target = target.rstrip('/')
+
+    def request(self, method, url, body):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.target + url, data=data, method=method,
+                                     headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(req) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as error:
+            return error.code
+
+
+class RequestFactory:
+    """Concrete URLs and bodies for a url rule, with random ids in the seeded range."""
+
+    def __init__(self, app, scale, users):
+        from resources import RESOURCES
+        from models import User
+        self.scale = scale
+        self.users = users
+        self.tables = {resource.plural: resource.model.__table__ for resource in RESOURCES}
+        self.tables['users'] = User.__table__
+        self.favorite_types = [resource.singular for resource in RESOURCES]
+        self.counter = itertools.count(scale + 1)
+        self.lock = threading.Lock()
+
+    def next_id(self):
+        with self.lock:
+            return next(self.counter)
+
+    def url(self, rule, method):
+        values = {}
+        for arg in rule.arguments:
+            upper = self.users if arg == 'user_id' else self.scale
+            values[arg] = random.randint(1, upper)
+        if method == 'DELETE' and len(values) == 2 and 'user_id' in values:
+            # a (user, entity) pair that seed() created, so deletes hit a row
+            i = random.randrange(self.scale)
+            entity_arg = next(arg for arg in values if arg != 'user_id')
+            values = {'user_id': i % self.users + 1, entity_arg: (i // self.users) % self.scale + 1}
+        return rule.build(values, append_unknown=False)[1]
+
+    def favorite_items(self, method):
+        # seed() gives every user the entities 1..scale / users of each type,
+        # so deleted items hit a row; added ones are anywhere in the catalog
+        upper = max(1, self.scale // self.users) if method == 'DELETE' else self.scale
+        return [{'type': random.choice(self.favorite_types), 'id': random.randint(1, upper)}
+                for _ in range(BATCH_ITEMS)]
+
+    def body(self, rule, method):
+        parts = rule.rule.strip('/').split('/')
+        if len(parts) == 3 and parts[0] == 'users' and parts[2] == 'favorites':
+            # POST/DELETE /users/<id>/favorites take a list of {type, id}
+            return self.favorite_items(method)
+        if method != 'POST':
+            return None
+        table = self.tables.get(parts[0])
+        if parts == ['users']:
+            i = self.next_id()
+            return {'username': f'load-{i}', 'email': f'load-{i}@example.com', 'password': 'x'}
+        if table is None or len(parts) > 2:
+            return None
+        if parts[-1] == 'bulk':
+            return [fake_row(table, self.next_id()) for _ in range(BATCH_ITEMS)]
+        if len(parts) == 1:
+            return fake_row(table, self.next_id())
+        return None
+
+
+def discover_routes(app, only=None):
+    routes = []
+    for rule in app.url_map.iter_rules():
+        if rule.rule.startswith(SKIP_PREFIXES):
+            continue
+        if only and rule.rule.strip('/').split('/')[0] not in only:
+            continue
+        for method in METHODS:
+            if method in rule.methods:
+                routes.append((method, rule))
+    return sorted(routes, key=lambda route: (route[1].rule, route[0]))
+
+
+def run_route(driver, factory, method, rule, requests, concurrency):
+    def one(_):
+        url = factory.url(rule, method)
+        body = factory.body(rule, method)
+        started = time.perf_counter()
+        status = driver.request(method, url, body)
+        return time.perf_counter() - started, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    statuses = Counter(status for _, status in results)
+    return {
+        'route': f'{method} {rule.rule}',
+        'endpoint': rule.endpoint,
+        'requests': requests,
+        'errors': sum(count for status, count in statuses.items() if status >= 500),
+        'status_counts': {str(status): count for status, count in sorted(statuses.items())},
+        'throughput_rps': requests / elapsed if elapsed else 0.0,
+        **percentiles([latency for latency, _ in results]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=int, default=1000, help='rows per table (1000, 100000, 1000000)')
+    parser.add_argument('--users', type=int, default=None)
+    parser.add_argument('--requests', type=int, default=200, help='requests per route')
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--db-url', default=None, help='defaults to a throwaway SQLite file')
+    parser.add_argument('--target', default=None, help='base URL of a running server')
+    parser.add_argument('--routes', nargs='*', help='only routes under these prefixes, e.g. planets users')
+    parser.add_argument('--no-seed', action='store_true', help='reuse the data already in --db-url')
+    parser.add_argument('--output', default=None, help='write the results as JSON')
+    args = parser.parse_args()
+
+    random.seed(1)
+    app = load_app(args.db_url)
+    # 500s are counted in the report, the tracebacks would only flood the output
+    app.logger.setLevel(logging.CRITICAL)
+    started = time.perf_counter()
+    users = args.users or max(1, args.scale // 10)
+    if not args.no_seed:
+        users = seed(app, args.scale, args.users)
+    seed_seconds = time.perf_counter() - started
+
+    driver = HTTPDriver(args.target) if args.target else TestClientDriver(app)
+    factory = RequestFactory(app, args.scale, users)
+
+    results = []
+    for method, rule in discover_routes(app, args.routes):
+        result = run_route(driver, factory, method, rule, args.requests, args.concurrency)
+        results.append(result)
+        print(f"{result['route']:<62} p50 {result['p50_ms']:8.2f}  p95 {result['p95_ms']:8.2f}  "
+              f"p99 {result['p99_ms']:8.2f} ms  {result['throughput_rps']:8.1f} req/s  "
+              f"{result['status_counts']}")
+
+    report = {
+        'commit': git_commit(),
+        'scale': args.scale,
+        'users': users,
+        'requests_per_route': args.requests,
+        'concurrency': args.concurrency,
+        'target': args.target or 'test_client',
+        'seed_seconds': seed_seconds,
+        'routes': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
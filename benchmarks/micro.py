@@ -0,0 +1,75 @@
+"""Micro-benchmarks of the hot helpers behind the routes.
+
+Each case runs --rounds times after a warm-up inside an app context and
+reports p50/p95/p99 per call, as JSON with --output.
+
+    python benchmarks/micro.py --scale 100000 --output micro.json
+"""
+import argparse
+import json
+import time
+
+from common import load_app, seed, percentiles, git_commit
+
+
+def cases(app, scale, users):
+    from models import db
+    from resources import RESOURCES_BY_NAME
+    from favorites import load_user_favorites
+    from cache import get_entity
+    from utils import build_sitemap
+    from sqlalchemy import select
+
+    planets = RESOURCES_BY_NAME['planets']
+    Planet = planets.model
+
+    def orm_serialize_planets():
+        return [planets.serialize(planet) for planet in Planet.query.limit(1000).all()]
+
+    def column_select_planets():
+        return [dict(row._mapping) for row in db.session.execute(select(*Planet.__table__.columns).limit(1000))]
+
+    def user_favorites():
+        return load_user_favorites(users // 2 + 1)
+
+    def cached_planet():
+        return get_entity(Planet, scale // 2, planets.serialize)
+
+    def sitemap():
+        return build_sitemap(app)
+
+    return [orm_serialize_planets, column_select_planets, user_favorites, cached_planet, sitemap]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=int, default=10000)
+    parser.add_argument('--rounds', type=int, default=100)
+    parser.add_argument('--db-url', default=None)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    app = load_app(args.db_url)
+    users = seed(app, args.scale)
+
+    results = []
+    with app.app_context():
+        for case in cases(app, args.scale, users):
+            case()
+            samples = []
+            for _ in range(args.rounds):
+                started = time.perf_counter()
+                case()
+                samples.append(time.perf_counter() - started)
+            result = {'case': case.__name__, 'rounds': args.rounds, **percentiles(samples)}
+            results.append(result)
+            print(f"{case.__name__:<24} p50 {result['p50_ms']:8.3f}  p95 {result['p95_ms']:8.3f}  "
+                  f"p99 {result['p99_ms']:8.3f} ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'commit': git_commit(), 'scale': args.scale, 'cases': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""gunicorn config used by the benchmarks' --db-latency-ms.
+
+Every SQLite statement sleeps BENCH_DB_LATENCY_MS before running, like the
+round trip to a database server. The sleep happens where the driver runs
+the statement: in the request thread for the sync worker, in aiosqlite's
+connection thread for the async one, so the event loop keeps serving.
+"""
+import os
+import sqlite3
+import sqlite3.dbapi2
+import time
+
+# the production profile, with the latency on top (gunicorn reads one config)
+exec(open(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'gunicorn.conf.py')).read())
+
+LATENCY = float(os.getenv('BENCH_DB_LATENCY_MS', '0')) / 1000
+
+
+class SlowCursor(sqlite3.Cursor):
+    def execute(self, *args, **kwargs):
+        time.sleep(LATENCY)
+        return super().execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        time.sleep(LATENCY)
+        return super().executemany(*args, **kwargs)
+
+
+class SlowConnection(sqlite3.Connection):
+    def cursor(self, factory=SlowCursor):
+        return super().cursor(factory)
+
+
+_connect = sqlite3.connect
+
+
+def connect(*args, **kwargs):
+    kwargs.setdefault('factory', SlowConnection)
+    return _connect(*args, **kwargs)
+
+
+# runs in the gunicorn master before the workers fork and import the app;
+# SQLAlchemy connects through sqlite3.dbapi2, aiosqlite through sqlite3
+sqlite3.connect = sqlite3.dbapi2.connect = connect
@@ -0,0 +1,56 @@
+"""Production gunicorn profile, picked up by `gunicorn` run from the repo root.
+
+SERVER_MODE=asgi serves src/asgi.py on uvicorn workers, anything else
+src/wsgi.py on threaded sync workers. WEB_CONCURRENCY, GUNICORN_THREADS,
+GUNICORN_PRELOAD and GUNICORN_MAX_REQUESTS override the defaults; command
+line arguments override everything. Measured numbers per configuration are
+in benchmarks/README.md (bench_gunicorn.py).
+"""
+import multiprocessing
+import os
+import sys
+
+cores = multiprocessing.cpu_count()
+asgi = os.getenv("SERVER_MODE") == "asgi"
+
+chdir = "src"
+wsgi_app = "asgi:application" if asgi else "wsgi"
+
+if asgi:
+    # one event loop per core, it already overlaps the requests waiting on the database
+    worker_class = "uvicorn_worker.UvicornWorker"
+    workers = int(os.getenv("WEB_CONCURRENCY", cores))
+else:
+    # a few threads per worker cover the time spent waiting on the database
+    # without a process (and a copy of the app) each
+    worker_class = "gthread"
+    workers = int(os.getenv("WEB_CONCURRENCY", cores + 1))
+    threads = int(os.getenv("GUNICORN_THREADS", 4))
+
+# import the app once in the master: the workers share its pages copy-on-write
+# and a broken deploy fails before any worker starts
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() != "false"
+
+# recycle workers now and then (slow leaks, fragmentation), not all at once.
+# Off for uvicorn workers: they reset the connections already accepted
+# when they reach the limit
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 0 if asgi else 1000))
+max_requests_jitter = max_requests // 10
+
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+
+
+def post_fork(server, worker):
+    # engines created in the master (preload_app) must not hand its
+    # connections to the workers: start each worker with an empty pool,
+    # without closing the connections, which still belong to the master
+    if "app" in sys.modules:
+        from app import app
+        from models import db
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose(close=False)
+    if "asgi" in sys.modules:
+        sys.modules["asgi"].engine.sync_engine.dispose(close=False)
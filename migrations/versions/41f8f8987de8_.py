@@ -0,0 +1,48 @@
+"""favorite_counts for the top favorited endpoints
+
+Revision ID: 41f8f8987de8
+Revises: f68360ed9029
+Create Date: 2026-10-18 13:42:00.178744
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '41f8f8987de8'
+down_revision = 'f68360ed9029'
+branch_labels = None
+depends_on = None
+
+
+# favorite type -> (favorite table, entity column)
+FAVORITE_TABLES = {
+    'planet': ('planet_favorites', 'planet_id'),
+    'specie': ('specie_favorites', 'specie_id'),
+    'vehicle': ('vehicle_favorites', 'vehicle_id'),
+    'starship': ('starship_favorites', 'starship_id'),
+    'person': ('person_favorites', 'person_id'),
+}
+
+
+def upgrade():
+    op.create_table('favorite_counts',
+    sa.Column('type', sa.String(length=20), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('type', 'entity_id')
+    )
+    op.create_index('ix_favorite_counts_type_count', 'favorite_counts', ['type', 'count', 'entity_id'])
+
+    # counters for the favorites that already exist
+    for fav_type, (table, column) in FAVORITE_TABLES.items():
+        op.execute(
+            f"INSERT INTO favorite_counts (type, entity_id, count) "
+            f"SELECT '{fav_type}', {column}, COUNT(*) FROM {table} GROUP BY {column}"
+        )
+
+
+def downgrade():
+    op.drop_index('ix_favorite_counts_type_count', table_name='favorite_counts')
+    op.drop_table('favorite_counts')
@@ -0,0 +1,40 @@
+"""favorites: every favorite type in one table
+
+Revision ID: 9d2f4c1b7a63
+Revises: 41f8f8987de8
+Create Date: 2026-10-18 16:05:12.412907
+
+Only the table: the rows are copied online with `flask favorites migrate`,
+in short transactions, while the app writes both (FAVORITES_STORE=dual).
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d2f4c1b7a63'
+down_revision = '41f8f8987de8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('favorites',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('entity_type', sa.String(length=20), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_favorites_user_id_entity_type_entity_id', 'favorites',
+                    ['user_id', 'entity_type', 'entity_id'], unique=True, postgresql_include=['id'])
+    op.create_index('ix_favorites_entity_type_entity_id', 'favorites', ['entity_type', 'entity_id'])
+
+
+def downgrade():
+    op.drop_index('ix_favorites_entity_type_entity_id', table_name='favorites')
+    op.drop_index('ix_favorites_user_id_entity_type_entity_id', table_name='favorites')
+    op.drop_table('favorites')
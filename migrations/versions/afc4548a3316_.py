@@ -0,0 +1,28 @@
+"""table_versions for ETags
+
+Revision ID: afc4548a3316
+Revises: b60c32828713
+Create Date: 2026-10-18 11:20:53.640117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'afc4548a3316'
+down_revision = 'b60c32828713'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('table_versions',
+    sa.Column('key', sa.String(length=100), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade():
+    op.drop_table('table_versions')
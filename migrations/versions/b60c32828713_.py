@@ -0,0 +1,41 @@
+"""case-insensitive unique name index on catalog tables
+
+Revision ID: b60c32828713
+Revises: f1634a3ba30a
+Create Date: 2026-10-18 10:41:07.218345
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b60c32828713'
+down_revision = 'f1634a3ba30a'
+branch_labels = None
+depends_on = None
+
+
+CATALOG_TABLES = ['planets', 'species', 'vehicles', 'starships', 'people']
+
+
+def upgrade():
+    conn = op.get_bind()
+    for table in CATALOG_TABLES:
+        # catalog rows are referenced by favorites, so duplicates are not
+        # deleted here: they have to be merged by hand before upgrading
+        duplicates = conn.execute(sa.text(
+            f"SELECT lower(name) FROM {table} GROUP BY lower(name) HAVING COUNT(*) > 1"
+        )).scalars().all()
+        if duplicates:
+            raise RuntimeError(
+                f"{table} has names that differ only by case: {', '.join(duplicates[:20])}")
+
+        # an expression rather than text() so MySQL gets the extra parentheses
+        # a functional key part needs
+        op.create_index(f'ix_{table}_name_lower', table, [sa.func.lower(sa.column('name'))], unique=True)
+
+
+def downgrade():
+    for table in reversed(CATALOG_TABLES):
+        op.drop_index(f'ix_{table}_name_lower', table_name=table)
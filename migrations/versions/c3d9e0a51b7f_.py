@@ -0,0 +1,70 @@
+"""search index over the catalog
+
+Revision ID: c3d9e0a51b7f
+Revises: afc4548a3316
+Create Date: 2026-10-18 13:05:12.418530
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3d9e0a51b7f'
+down_revision = 'afc4548a3316'
+branch_labels = None
+depends_on = None
+
+
+# the text columns of each table at this revision (Resource.searchable); the
+# app builds the same statements in search.py for db.create_all() databases
+SEARCHABLE = {
+    'planets': ['name', 'terrain', 'climate'],
+    'species': ['name', 'hair_color', 'skin_color', 'language'],
+    'vehicles': ['name', 'consumable', 'class_name', 'terrain'],
+    'starships': ['name', 'consumable', 'class_name'],
+    'people': ['name', 'hair_color', 'skin_color', 'eye_color', 'gender'],
+}
+
+
+def pg_document(columns):
+    # the expression search.text_match() queries, so the planner uses the index
+    parts = " || ' ' || ".join(f"coalesce({column}, '')" for column in columns)
+    return f"to_tsvector('simple', {parts})"
+
+
+def upgrade():
+    # FTS5 tables on SQLite, tsvector GIN indexes on Postgres, nothing
+    # elsewhere (search falls back to LIKE)
+    dialect = op.get_bind().dialect.name
+    for table, searchable in SEARCHABLE.items():
+        if dialect == 'sqlite':
+            fts = f'{table}_search'
+            columns = ', '.join(searchable)
+            new = ', '.join(f'new.{column}' for column in searchable)
+            old = ', '.join(f'old.{column}' for column in searchable)
+            delete = f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old});"
+            insert = f'INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new});'
+            op.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({columns}, "
+                       f"content='{table}', content_rowid='id', prefix='2 3 4')")
+            op.execute(f'CREATE TRIGGER IF NOT EXISTS {table}_search_insert AFTER INSERT ON {table} '
+                       f'BEGIN {insert} END')
+            op.execute(f'CREATE TRIGGER IF NOT EXISTS {table}_search_update AFTER UPDATE ON {table} '
+                       f'BEGIN {delete} {insert} END')
+            op.execute(f'CREATE TRIGGER IF NOT EXISTS {table}_search_delete AFTER DELETE ON {table} '
+                       f'BEGIN {delete} END')
+            # index the rows that were there before the triggers
+            op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+        elif dialect == 'postgresql':
+            op.execute(f'CREATE INDEX IF NOT EXISTS ix_{table}_search ON {table} '
+                       f'USING gin (({pg_document(searchable)}))')
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for table in reversed(list(SEARCHABLE)):
+        if dialect == 'sqlite':
+            for event in ('insert', 'update', 'delete'):
+                op.execute(f'DROP TRIGGER IF EXISTS {table}_search_{event}')
+            op.execute(f'DROP TABLE IF EXISTS {table}_search')
+        elif dialect == 'postgresql':
+            op.execute(f'DROP INDEX IF EXISTS ix_{table}_search')
@@ -0,0 +1,30 @@
+"""favorites_documents: materialized GET /users/<id>/favorites bodies
+
+Revision ID: e4b7a2c9d150
+Revises: 9d2f4c1b7a63
+Create Date: 2026-10-18 18:22:47.903114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b7a2c9d150'
+down_revision = '9d2f4c1b7a63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('favorites_documents',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('body', sa.LargeBinary(length=4294967295), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade():
+    op.drop_table('favorites_documents')
@@ -0,0 +1,44 @@
+"""unique (user_id, entity_id) and entity_id indexes on favorite tables
+
+Revision ID: f1634a3ba30a
+Revises: 78b1e393ed26
+Create Date: 2026-10-18 10:12:41.503912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1634a3ba30a'
+down_revision = '78b1e393ed26'
+branch_labels = None
+depends_on = None
+
+
+FAVORITE_TABLES = [
+    ('planet_favorites', 'planet_id'),
+    ('specie_favorites', 'specie_id'),
+    ('vehicle_favorites', 'vehicle_id'),
+    ('starship_favorites', 'starship_id'),
+    ('person_favorites', 'person_id'),
+]
+
+
+def upgrade():
+    for table, fk in FAVORITE_TABLES:
+        # drop duplicates left by the old check-then-insert handlers, keeping
+        # the oldest row, otherwise the unique index can't be created
+        op.execute(
+            f"DELETE FROM {table} WHERE id NOT IN ("
+            f"SELECT id FROM (SELECT MIN(id) AS id FROM {table} "
+            f"GROUP BY user_id, {fk}) AS keep_rows)"
+        )
+        op.create_index(f'ix_{table}_user_id_{fk}', table, ['user_id', fk], unique=True)
+        op.create_index(f'ix_{table}_{fk}', table, [fk], unique=False)
+
+
+def downgrade():
+    for table, fk in reversed(FAVORITE_TABLES):
+        op.drop_index(f'ix_{table}_{fk}', table_name=table)
+        op.drop_index(f'ix_{table}_user_id_{fk}', table_name=table)
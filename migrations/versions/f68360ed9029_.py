@@ -0,0 +1,37 @@
+"""sort indexes on catalog tables
+
+Revision ID: f68360ed9029
+Revises: c3d9e0a51b7f
+Create Date: 2026-10-18 13:37:23.629222
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f68360ed9029'
+down_revision = 'c3d9e0a51b7f'
+branch_labels = None
+depends_on = None
+
+
+# (column, id) indexes backing the sorts of the list endpoints
+SORT_INDEXES = {
+    'planets': ['name', 'diameter', 'gravity', 'population', 'climate'],
+    'species': ['name', 'height', 'average_life', 'language'],
+    'vehicles': ['name', 'crew', 'passengers', 'cargo_cap', 'class_name'],
+    'starships': ['name', 'crew', 'passengers', 'cargo_cap', 'hyperdrive_rating', 'class_name'],
+    'people': ['name', 'height', 'gender'],
+}
+
+
+def upgrade():
+    for table, columns in SORT_INDEXES.items():
+        for column in columns:
+            op.create_index(f'ix_{table}_{column}_id', table, [column, 'id'])
+
+
+def downgrade():
+    for table, columns in reversed(SORT_INDEXES.items()):
+        for column in reversed(columns):
+            op.drop_index(f'ix_{table}_{column}_id', table_name=table)
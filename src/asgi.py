@@ -0,0 +1,241 @@
+"""ASGI entry point, the async alternative to wsgi.py.
+
+The read routes that spend their time waiting on the database (catalog
+lists and details, /<type>/top, /users/<id>/favorites) are served by async
+handlers on an async SQLAlchemy engine: aiosqlite, asyncpg or aiomysql,
+picked from DATABASE_URL (or ASYNC_DATABASE_URL). Every other route is the
+Flask app itself, mounted behind them, so both entry points serve the same
+API with the same bodies, headers and ETags.
+
+    uvicorn asgi:application --app-dir src
+    SERVER_MODE=asgi gunicorn    # from the repo root, see gunicorn.conf.py
+"""
+import os
+from contextlib import asynccontextmanager
+from urllib.parse import urlencode
+
+from a2wsgi import WSGIMiddleware
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from starlette.applications import Starlette
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route, Mount
+from werkzeug.datastructures import MultiDict, MIMEAccept
+from werkzeug.http import parse_etags, parse_accept_header
+
+from app import app as flask_app
+from utils import APIException
+from db_pool import async_database_url, async_engine_options
+from cache import entity_cache, entity_key
+from etags import make_etag, version_query, version_cache
+from favorites import user_favorites_query, group_favorites, favorites_version_key
+from favorite_documents import documents_enabled, document_query, encode_document, store_statements
+from pagination import (parse_int_arg, parse_fields, list_statements, next_page_args, next_cursor,
+                        DEFAULT_LIMIT, MAX_LIMIT, STREAM_BATCH_SIZE, NDJSON_MIMETYPE)
+from filters import parse_sort
+from popularity import top_favorited_query, DEFAULT_TOP, MAX_TOP
+from serializers import row_encoder
+from resources import RESOURCES
+from models import User
+
+database_uri = flask_app.config['SQLALCHEMY_DATABASE_URI']
+favorites_store = flask_app.config['FAVORITES_STORE']
+documents = documents_enabled(flask_app)
+engine = create_async_engine(os.getenv('ASYNC_DATABASE_URL') or async_database_url(database_uri),
+                             **async_engine_options(database_uri))
+Session = async_sessionmaker(engine, expire_on_commit=False)
+
+
+# what CORS(app) adds to every Flask response with its default options
+CORS_HEADERS = {"Access-Control-Allow-Origin": "*"}
+
+
+def json_response(obj, status=200, headers=None):
+    # same body as flask.jsonify: the app's JSON provider, compact, newline at the end
+    body = flask_app.json.dumps(obj, separators=(",", ":")) + "\n"
+    return Response(body, status_code=status, headers={**CORS_HEADERS, **(headers or {})},
+                    media_type="application/json")
+
+
+def query_args(request):
+    return MultiDict(request.query_params.multi_items())
+
+
+async def get_entity(session, model, entity_id, serialize):
+    # cache.get_entity() with an awaited loader, same cache and keys
+    key = entity_key(model, entity_id)
+    value = entity_cache.lookup(key)
+    if value is None:
+        entity = await session.get(model, entity_id)
+        value = serialize(entity) if entity is not None else None
+        entity_cache.store(key, value)
+    return value
+
+
+async def conditional(request, session, resource, key, view, cache_version=False):
+    """etags.conditional() for an async view: 304 on a matching If-None-Match.
+    The view finds the version in request.state.etag_version."""
+    version = version_cache.get(key) if cache_version else None
+    if version is None:
+        version = (await session.execute(version_query(key))).scalar() or 0
+        if cache_version:
+            version_cache.set(key, version)
+    request.state.etag_version = version
+    variant = request.scope["query_string"] + request.headers.get("accept", "").encode()
+    etag = make_etag(key, version, variant)
+    cache_control = flask_app.config["CACHE_CONTROL"].get(resource, flask_app.config["CACHE_CONTROL_DEFAULT"])
+
+    if parse_etags(request.headers.get("if-none-match")).contains_weak(etag):
+        response = Response(status_code=304, headers=CORS_HEADERS)
+    else:
+        response = await view()
+        if response.status_code != 200:
+            return response
+
+    response.headers["ETag"] = f'"{etag}"'
+    response.headers["Cache-Control"] = cache_control
+    # JSON or NDJSON depending on Accept (wants_stream)
+    response.headers["Vary"] = "Accept"
+    return response
+
+
+def wants_stream(request, args):
+    if args.get('stream') in ('1', 'true'):
+        return True
+    return parse_accept_header(request.headers.get("accept"), MIMEAccept).best == NDJSON_MIMETYPE
+
+
+def stream_ndjson(columns, statements):
+    encode = row_encoder(columns)
+    dumps = flask_app.json.dumps
+
+    async def generate():
+        async with Session() as session:
+            for stmt in statements:
+                result = await session.stream(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+                async for partition in result.partitions():
+                    yield "".join(dumps(item) + "\n" for item in encode(partition))
+
+    return StreamingResponse(generate(), headers=CORS_HEADERS, media_type=NDJSON_MIMETYPE)
+
+
+def list_endpoint(resource):
+    model = resource.model
+
+    async def endpoint(request):
+        args = query_args(request)
+
+        async def view():
+            columns = parse_fields(model, args)
+            sort = parse_sort(model, args)
+            if wants_stream(request, args):
+                return stream_ndjson(columns, list_statements(model, columns, sort, args))
+
+            limit = parse_int_arg('limit', default=DEFAULT_LIMIT, minimum=1, maximum=MAX_LIMIT, args=args)
+            statements = list_statements(model, columns, sort, args)
+            rows = []
+            for stmt in statements:
+                rows += (await session.execute(stmt.limit(limit + 1 - len(rows)))).all()
+                if len(rows) > limit:
+                    break
+            headers = {}
+            if len(rows) > limit:
+                rows = rows[:limit]
+                # encoded the way werkzeug builds the query string of url_for()
+                query = urlencode(next_page_args(args, rows[-1], limit, sort), safe="!$'()*,/:;?@")
+                headers['X-Next-Cursor'] = next_cursor(rows[-1], sort)
+                headers['Link'] = f'<{request.url.path}?{query}>; rel="next"'
+            return json_response(row_encoder(columns)(rows), headers=headers)
+
+        async with Session() as session:
+            return await conditional(request, session, resource.plural, resource.plural, view)
+    return endpoint
+
+
+def detail_endpoint(resource):
+    async def endpoint(request):
+        async def view():
+            entity = await get_entity(session, resource.model, request.path_params['id'], resource.serialize)
+            if not entity:
+                return json_response({"Error": f"{resource.singular} not found"}, 404)
+            return json_response(entity)
+
+        async with Session() as session:
+            return await conditional(request, session, resource.plural, resource.plural, view, cache_version=True)
+    return endpoint
+
+
+def top_endpoint(resource):
+    async def endpoint(request):
+        limit = parse_int_arg('limit', default=DEFAULT_TOP, minimum=1, maximum=MAX_TOP, args=query_args(request))
+        columns, stmt = top_favorited_query(resource, limit)
+        async with Session() as session:
+            rows = (await session.execute(stmt)).all()
+        return json_response(row_encoder(columns)(rows))
+    return endpoint
+
+
+async def favorites_document(session, user_id, version):
+    # favorite_documents.favorites_document() on the async session
+    row = (await session.execute(document_query(user_id))).first()
+    if row is not None and row.version == version:
+        return row.body
+
+    rows = (await session.execute(user_favorites_query(user_id, favorites_store))).all()
+    body = encode_document(flask_app, group_favorites(rows))
+    update_stmt, insert_stmt = store_statements(engine.dialect.name, user_id, version, body)
+    try:
+        if (await session.execute(update_stmt)).rowcount == 0:
+            await session.execute(insert_stmt)
+        await session.commit()
+    except Exception:
+        await session.rollback()
+    return body
+
+
+async def user_favorites(request):
+    user_id = request.path_params['user_id']
+
+    async def view():
+        if not await get_entity(session, User, user_id, User.serialize_user):
+            return json_response({"Error": "user not found"}, 404)
+        if not documents:
+            rows = (await session.execute(user_favorites_query(user_id, favorites_store))).all()
+            return json_response({"All my favorites": group_favorites(rows)})
+        return Response(await favorites_document(session, user_id, request.state.etag_version),
+                        headers=CORS_HEADERS, media_type="application/json")
+
+    async with Session() as session:
+        return await conditional(request, session, 'favorites', favorites_version_key(user_id), view)
+
+
+async def healthz(request):
+    return json_response({"status": "ok"})
+
+
+def handle_api_exception(request, error):
+    return json_response(error.to_dict(), error.status_code)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    await engine.dispose()
+
+
+def build_routes():
+    routes = [Route('/healthz', healthz, methods=['GET'])]
+    for resource in RESOURCES:
+        plural = resource.plural
+        routes += [
+            Route(f'/{plural}', list_endpoint(resource), methods=['GET']),
+            Route(f'/{plural}/top', top_endpoint(resource), methods=['GET']),
+            Route(f'/{plural}/{{id:int}}', detail_endpoint(resource), methods=['GET']),
+        ]
+    routes.append(Route('/users/{user_id:int}/favorites', user_favorites, methods=['GET']))
+    # everything else (writes, users, search, admin, metrics...) is the Flask app
+    routes.append(Mount('/', app=WSGIMiddleware(flask_app)))
+    return routes
+
+
+application = Starlette(routes=build_routes(), lifespan=lifespan,
+                        exception_handlers={APIException: handle_api_exception})
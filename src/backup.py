@@ -0,0 +1,302 @@
+"""Export and import of every table to chunked files, behind `flask catalog`.
+
+    <dir>/manifest.json                    format, migration revision, columns, rows and files per table
+    <dir>/<table>/part-00000.csv.gz        csv and ndjson: CHUNK_ROWS rows per gzipped file
+    <dir>/<table>.arrow, <table>.parquet   arrow and parquet (pyarrow): one record batch / row group per chunk
+
+Ids are exported, so favorites, counters and ETag versions come back
+pointing to the same rows. Materialized favorites documents are not: the
+import bumps every version, they would all be stale. Tables are read in
+chunks from a streamed result and written chunk by chunk, so memory doesn't
+grow with the table. Datetimes are ISO 8601 strings in csv and ndjson.
+Arrow files are uncompressed so the import reads them memory-mapped.
+"""
+import csv
+import gzip
+import json
+import os
+import time
+from datetime import datetime
+from contextlib import nullcontext
+import click
+from sqlalchemy import Integer, Float, DateTime, select, insert, func, update, bindparam, inspect, text
+from utils import CSV_NULL, bulk_insert, copy_from_csv, reset_id_sequence
+from search import bulk_insert_search_index
+from cache import entity_cache
+from favorites import bump_favorites_versions
+from resources import RESOURCES
+from models import db, TableVersion
+
+FORMATS = ("csv", "ndjson", "arrow", "parquet")
+CHUNK_ROWS = 100000
+# gzip level: 1 is 3-4x faster than the default 9 for files ~20% larger
+COMPRESSLEVEL = 1
+MANIFEST = "manifest.json"
+# rebuilt from the other tables on use
+DERIVED_TABLES = ("favorites_documents",)
+
+RESOURCES_BY_TABLE = {resource.table: resource for resource in RESOURCES}
+
+
+def require_pyarrow():
+    # imported on use: the app (and every worker) imports this module through commands.py
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise click.ClickException("the arrow and parquet formats need the pyarrow package")
+    return pyarrow
+
+
+def arrow_batch(pa, schema, rows):
+    return pa.record_batch([pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)],
+                           schema=schema)
+
+
+def arrow_schema(pa, table, names):
+    def arrow_type(column):
+        if isinstance(column.type, Integer):
+            return pa.int64()
+        if isinstance(column.type, Float):
+            return pa.float64()
+        if isinstance(column.type, DateTime):
+            return pa.timestamp("us")
+        return pa.string()
+    return pa.schema([(name, arrow_type(table.columns[name])) for name in names])
+
+
+def column_cast(column):
+    # text (csv) or JSON value (ndjson) -> the Python type of the column
+    if isinstance(column.type, Integer):
+        return int
+    if isinstance(column.type, Float):
+        return float
+    if isinstance(column.type, DateTime):
+        return datetime.fromisoformat
+    return str
+
+
+def json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def schema_revision(connection):
+    if not inspect(connection).has_table("alembic_version"):
+        return None
+    return connection.execute(text("SELECT version_num FROM alembic_version")).scalar()
+
+
+# Writers: (directory, table, names, chunks of rows) -> files written
+
+def write_csv(directory, table, names, chunks):
+    os.makedirs(os.path.join(directory, table.name), exist_ok=True)
+    files = []
+    for number, rows in enumerate(chunks):
+        path = os.path.join(table.name, f"part-{number:05d}.csv.gz")
+        with gzip.open(os.path.join(directory, path), "wt", compresslevel=COMPRESSLEVEL, newline="") as f:
+            csv.writer(f).writerows([CSV_NULL if value is None else value for value in row] for row in rows)
+        files.append(path)
+    return files
+
+
+def write_ndjson(directory, table, names, chunks):
+    os.makedirs(os.path.join(directory, table.name), exist_ok=True)
+    files = []
+    for number, rows in enumerate(chunks):
+        path = os.path.join(table.name, f"part-{number:05d}.ndjson.gz")
+        with gzip.open(os.path.join(directory, path), "wt", compresslevel=COMPRESSLEVEL) as f:
+            f.writelines(json.dumps(dict(zip(names, row)), separators=(",", ":"), default=json_default) + "\n"
+                         for row in rows)
+        files.append(path)
+    return files
+
+
+def write_arrow(directory, table, names, chunks):
+    pa = require_pyarrow()
+    schema = arrow_schema(pa, table, names)
+    path = f"{table.name}.arrow"
+    with pa.ipc.new_file(os.path.join(directory, path), schema) as writer:
+        for rows in chunks:
+            writer.write_batch(arrow_batch(pa, schema, rows))
+    return [path]
+
+
+def write_parquet(directory, table, names, chunks):
+    pa = require_pyarrow()
+    schema = arrow_schema(pa, table, names)
+    path = f"{table.name}.parquet"
+    with pa.parquet.ParquetWriter(os.path.join(directory, path), schema, compression="zstd") as writer:
+        for rows in chunks:
+            writer.write_batch(arrow_batch(pa, schema, rows))
+    return [path]
+
+
+# Readers: (directory, table, names, files, chunk_rows) -> chunks of tuples
+
+def read_csv(directory, table, names, files, chunk_rows):
+    # csv only has text: back to the column types
+    casts = [column_cast(table.columns[name]) for name in names]
+    for path in files:
+        with gzip.open(os.path.join(directory, path), "rt", newline="") as f:
+            yield [tuple(None if value == CSV_NULL else cast(value) for cast, value in zip(casts, row))
+                   for row in csv.reader(f)]
+
+
+def read_ndjson(directory, table, names, files, chunk_rows):
+    # JSON has numbers but no datetimes: only those are cast back
+    casts = {name: datetime.fromisoformat for name in names if isinstance(table.columns[name].type, DateTime)}
+    for path in files:
+        with gzip.open(os.path.join(directory, path), "rt") as f:
+            yield [tuple(casts[name](item[name]) if name in casts and item.get(name) is not None
+                         else item.get(name) for name in names) for item in map(json.loads, f)]
+
+
+def read_arrow(directory, table, names, files, chunk_rows):
+    pa = require_pyarrow()
+    for path in files:
+        with pa.memory_map(os.path.join(directory, path)) as source:
+            reader = pa.ipc.open_file(source)
+            for number in range(reader.num_record_batches):
+                batch = reader.get_batch(number).select(names)
+                yield list(zip(*(column.to_pylist() for column in batch.columns)))
+
+
+def read_parquet(directory, table, names, files, chunk_rows):
+    pa = require_pyarrow()
+    for path in files:
+        parquet_file = pa.parquet.ParquetFile(os.path.join(directory, path), memory_map=True)
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=names):
+            yield list(zip(*(column.to_pylist() for column in batch.columns)))
+
+
+WRITERS = {"csv": write_csv, "ndjson": write_ndjson, "arrow": write_arrow, "parquet": write_parquet}
+READERS = {"csv": read_csv, "ndjson": read_ndjson, "arrow": read_arrow, "parquet": read_parquet}
+
+
+def table_report(rows, started):
+    elapsed = time.perf_counter() - started
+    return {"rows": rows, "seconds": round(elapsed, 2), "rows_per_second": round(rows / elapsed) if elapsed else rows}
+
+
+def export_catalog(directory, fmt="csv", chunk_rows=CHUNK_ROWS):
+    """Write every table of models.py to `directory` in `fmt`; returns rows/second per table."""
+    if os.path.exists(os.path.join(directory, MANIFEST)):
+        raise click.ClickException(f"{directory} already has an export")
+    os.makedirs(directory, exist_ok=True)
+
+    options = {}
+    if db.engine.dialect.name in ("postgresql", "mysql"):
+        # every table from the same snapshot
+        options["isolation_level"] = "REPEATABLE READ"
+    connection = db.session.connection(execution_options=options)
+    manifest = {"format": fmt, "revision": schema_revision(connection), "chunk_rows": chunk_rows, "tables": {}}
+    report = {}
+    for table in db.metadata.sorted_tables:
+        if table.name in DERIVED_TABLES:
+            continue
+        started, names = time.perf_counter(), [column.name for column in table.columns]
+        count = 0
+
+        def chunks():
+            nonlocal count
+            stmt = select(*table.columns).order_by(*table.primary_key.columns)
+            for rows in connection.execute(stmt.execution_options(yield_per=chunk_rows)).partitions():
+                count += len(rows)
+                yield rows
+
+        files = WRITERS[fmt](directory, table, names, chunks())
+        manifest["tables"][table.name] = {"columns": names, "rows": count, "files": files}
+        report[table.name] = table_report(count, started)
+    db.session.rollback()
+
+    with open(os.path.join(directory, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return report
+
+
+def import_catalog(directory, replace=False):
+    """Load an export_catalog() directory into the same schema revision.
+
+    The tables must be empty, or emptied first with replace=True. Every
+    ETag version ends above both its exported and its replaced value, the
+    ones that had none included, so no client keeps a cached response.
+    The entity cache is cleared, its shared backend included; the local
+    copies of running workers expire within ENTITY_CACHE_TTL, restart them
+    to drop those at once.
+    """
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        raise click.ClickException(f"{directory} has no {MANIFEST}")
+    fmt = manifest["format"]
+    connection = db.session.connection()
+
+    revision = schema_revision(connection)
+    if manifest["revision"] != revision:
+        raise click.ClickException(f"the export is at revision {manifest['revision']}, the database at {revision}: "
+                                   "run `flask db upgrade` (or downgrade) to the same revision first")
+    tables = [table for table in db.metadata.sorted_tables if table.name in manifest["tables"]]
+    for table in tables:
+        missing = set(manifest["tables"][table.name]["columns"]) - set(table.columns.keys())
+        if missing:
+            raise click.ClickException(f"{table.name} has no column {', '.join(sorted(missing))}")
+
+    # versions before the import: a --replace must not send them back
+    previous = dict(connection.execute(select(TableVersion.key, TableVersion.version)).all())
+    if replace:
+        for name in DERIVED_TABLES:
+            connection.execute(db.metadata.tables[name].delete())
+        for table in reversed(tables):
+            connection.execute(table.delete())
+    else:
+        for table in tables:
+            if connection.execute(select(func.count()).select_from(table)).scalar():
+                raise click.ClickException(f"{table.name} is not empty, use --replace to overwrite it")
+
+    report = {}
+    for table in tables:
+        entry = manifest["tables"][table.name]
+        started, names, count = time.perf_counter(), entry["columns"], 0
+        resource = RESOURCES_BY_TABLE.get(table.name)
+        index = bulk_insert_search_index(connection, resource, 0) if resource else nullcontext()
+        with index:
+            if fmt == "csv" and connection.dialect.name == "postgresql" and connection.dialect.driver == "psycopg2":
+                # the files are already what COPY reads
+                for path in entry["files"]:
+                    with gzip.open(os.path.join(directory, path), "rt", newline="") as f:
+                        copy_from_csv(connection, table, names, f)
+                count = connection.execute(select(func.count()).select_from(table)).scalar()
+            else:
+                for rows in READERS[fmt](directory, table, names, entry["files"], manifest["chunk_rows"]):
+                    bulk_insert(connection, table, names, rows)
+                    count += len(rows)
+        if count != entry["rows"]:
+            raise click.ClickException(f"{table.name}: read {count} rows, the manifest has {entry['rows']}")
+        if "id" in names:
+            reset_id_sequence(connection, table)
+        report[table.name] = table_report(count, started)
+
+    imported = dict(connection.execute(select(TableVersion.key, TableVersion.version)).all())
+    connection.execute(update(TableVersion).values(version=TableVersion.version + 1))
+    raised = [{"k": key, "v": version + 1} for key, version in previous.items()
+              if key in imported and version > imported[key]]
+    if raised:
+        connection.execute(update(TableVersion).where(TableVersion.key == bindparam("k"))
+                           .values(version=bindparam("v")), raised)
+    dropped = [{"key": key, "version": version + 1} for key, version in previous.items() if key not in imported]
+    if dropped:
+        connection.execute(insert(TableVersion), dropped)
+    # keys in neither database were served as version 0 (tables and users
+    # never written through the API): they start at 1
+    unversioned = [{"key": resource.plural, "version": 1} for resource in RESOURCES
+                   if resource.plural not in previous and resource.plural not in imported]
+    if unversioned:
+        connection.execute(insert(TableVersion), unversioned)
+    # every user's favorites, the ones without a version included; commits
+    bump_favorites_versions()
+    # the same ids now hold other rows
+    entity_cache.clear()
+    return report
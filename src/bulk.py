@@ -0,0 +1,231 @@
+import json
+from flask import request, jsonify
+from sqlalchemy import select, insert, func, literal, String
+from sqlalchemy.exc import IntegrityError
+from utils import APIException
+from filters import parse_value
+from models import db
+from cache import invalidate_entity
+from etags import bump_version
+from favorites import add_favorites, remove_favorites
+from resources import RESOURCES
+
+CHUNK_SIZE = 1000
+MAX_ITEMS = 100000
+# a user's favorites in one transaction: the ids of a type go in one IN list
+MAX_FAVORITE_ITEMS = 1000
+
+# "planet" or "planets"
+FAVORITE_TYPES = {name: resource for resource in RESOURCES for name in (resource.singular, resource.plural)}
+
+
+def iter_bulk_items():
+    # a JSON array in the body, or one JSON object per line with
+    # Content-Type: application/x-ndjson (read line by line, not all at once)
+    if request.mimetype == 'application/x-ndjson':
+        for line in request.stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+        return
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, list):
+        raise APIException("the body must be a JSON array", status_code=400)
+    yield from data
+
+
+def validate_item(item, resource):
+    """The error of an item to create as a `resource`, or None.
+
+    Numbers are checked against their column the way query parameters are
+    (filters.parse_value), "42" included, and converted in place.
+    """
+    if not isinstance(item, dict):
+        return "the item must be a JSON object"
+    if not isinstance(item.get('name'), str) or not item['name'].strip():
+        return "the field 'name' is required"
+    columns = resource.model.__table__.columns
+    for field in resource.fields:
+        value = item.get(field)
+        if value is None:
+            continue
+        column = columns[field]
+        if isinstance(column.type, String):
+            if not isinstance(value, str):
+                return f"the field '{field}' must be a string"
+        elif isinstance(value, (str, int, float)) and not isinstance(value, bool):
+            try:
+                item[field] = parse_value(column, str(value), field, kind="field")
+            except APIException as e:
+                return e.message
+        else:
+            return f"the field '{field}' must be a number"
+    return None
+
+
+def lowered_names(names):
+    """{name: lower(name)} as the database computes it, the way the unique
+    index on lower(name) compares names: SQLite's lower() only folds ASCII,
+    Python's folds everything. One row with a column per name (a chunk
+    stays under Postgres' 1664 columns)."""
+    names = list(dict.fromkeys(names))
+    return dict(zip(names, db.session.execute(
+        select(*[func.lower(literal(name, String)) for name in names])).one()))
+
+
+def insert_chunk(model, fields, chunk, seen, results):
+    # one set-based query for the names already in the table...
+    keys = lowered_names([item['name'] for _, item in chunk])
+    existing = set(db.session.execute(
+        select(func.lower(model.name)).where(func.lower(model.name).in_(set(keys.values())))
+    ).scalars())
+
+    rows = []
+    for index, item in chunk:
+        key = keys[item['name']]
+        if key in existing or key in seen:
+            results.append({"index": index, "name": item['name'], "status": "duplicate"})
+            continue
+        seen.add(key)
+        rows.append((index, {field: item.get(field) for field in fields}))
+
+    if not rows:
+        return
+
+    # ...and one executemany for the new rows
+    db.session.execute(insert(model), [row for _, row in rows])
+    bump_version(model.__tablename__)
+    # by the exact name: lower() differs between Python and the database
+    # (SQLite's only folds ASCII), the inserted strings don't
+    ids = dict(db.session.execute(
+        select(model.name, model.id).where(model.name.in_([row['name'] for _, row in rows]))
+    ).all())
+    for index, row in rows:
+        results.append({"index": index, "name": row['name'], "status": "created", "id": ids[row['name']]})
+
+
+def bulk_create(resource):
+    """Create many rows of a catalog resource in one transaction.
+
+    Items are validated and de-duplicated in chunks of CHUNK_SIZE; every
+    item gets a status (created, duplicate or invalid) in the response.
+    """
+    model, fields = resource.model, resource.fields
+    results = []
+    seen = set()
+    chunk = []
+
+    try:
+        for index, item in enumerate(iter_bulk_items()):
+            if index >= MAX_ITEMS:
+                raise APIException(f"no more than {MAX_ITEMS} items per request", status_code=413)
+            error = validate_item(item, resource)
+            if error:
+                results.append({"index": index, "status": "invalid", "Error": error})
+                continue
+            chunk.append((index, item))
+            if len(chunk) >= CHUNK_SIZE:
+                insert_chunk(model, fields, chunk, seen, results)
+                chunk = []
+        if chunk:
+            insert_chunk(model, fields, chunk, seen, results)
+        db.session.commit()
+    except IntegrityError:
+        # another request inserted one of the names after our duplicate check
+        db.session.rollback()
+        return jsonify({"Error": "some names were created concurrently, retry the request"}), 409
+    except APIException:
+        db.session.rollback()
+        raise
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"Error": str(e)}), 500
+
+    for result in results:
+        if result['status'] == 'created':
+            invalidate_entity(model, result['id'])
+
+    results.sort(key=lambda result: result['index'])
+    summary = {status: sum(1 for r in results if r['status'] == status)
+               for status in ("created", "duplicate", "invalid")}
+    return jsonify({**summary, "items": results}), 200
+
+
+def validate_favorite_item(item):
+    if not isinstance(item, dict):
+        return "the item must be a JSON object"
+    if item.get('type') not in FAVORITE_TYPES:
+        return "the field 'type' must be one of " + ", ".join(resource.singular for resource in RESOURCES)
+    if not isinstance(item.get('id'), int) or isinstance(item['id'], bool):
+        return "the field 'id' must be an integer"
+    return None
+
+
+def bulk_favorites(user_id, remove=False):
+    """Add (or remove) many favorites of a user, of any type, in one transaction.
+
+    The body is a list of {"type", "id"} items; every item gets a status in
+    the response: added, exists, deleted, not_found, duplicate or invalid.
+    """
+    results = []
+    pending = []
+    seen = set()
+    for index, item in enumerate(iter_bulk_items()):
+        if index >= MAX_FAVORITE_ITEMS:
+            raise APIException(f"no more than {MAX_FAVORITE_ITEMS} items per request", status_code=413)
+        error = validate_favorite_item(item)
+        if error:
+            results.append({"index": index, "status": "invalid", "Error": error})
+            continue
+        resource = FAVORITE_TYPES[item['type']]
+        result = {"index": index, "type": resource.singular, "id": item['id']}
+        if (resource, item['id']) in seen:
+            results.append({**result, "status": "duplicate"})
+            continue
+        seen.add((resource, item['id']))
+        pending.append((resource, result))
+
+    ids_by_resource = {}
+    for resource, result in pending:
+        ids_by_resource.setdefault(resource, []).append(result['id'])
+
+    try:
+        if remove:
+            statuses = remove_favorites(user_id, ids_by_resource)
+        else:
+            statuses = add_favorites(user_id, ids_by_resource)
+        db.session.commit()
+    except IntegrityError:
+        # another request added one of the favorites after our check
+        db.session.rollback()
+        return jsonify({"Error": "the favorites changed concurrently, retry the request"}), 409
+    except APIException:
+        db.session.rollback()
+        raise
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"Error": str(e)}), 500
+
+    for resource, result in pending:
+        if remove:
+            result['status'] = statuses[resource, result['id']]
+            if result['status'] == 'not_found':
+                result['Error'] = "favorite not found"
+        else:
+            result['status'], favorite = statuses[resource, result['id']]
+            if favorite:
+                result['favorite'] = favorite
+            elif result['status'] == 'not_found':
+                result['Error'] = f"{resource.singular} not found"
+        results.append(result)
+
+    results.sort(key=lambda result: result['index'])
+    outcomes = ("deleted",) if remove else ("added", "exists")
+    summary = {status: sum(1 for r in results if r['status'] == status)
+               for status in outcomes + ("not_found", "duplicate", "invalid")}
+    return jsonify({**summary, "items": results}), 200
@@ -0,0 +1,194 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from models import db
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+CLEAR_BATCH = 1000
+
+
+class LRUCache:
+    """In-process cache with a size bound and a TTL per entry."""
+
+    def __init__(self, maxsize=10000, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SharedCache:
+    """Cache shared between workers, backed by a redis-like client.
+
+    Any client with redis' get/setex/delete/scan_iter works, so fakeredis
+    (or a small dict-based stand-in) can be used locally instead of a real
+    server.
+    """
+
+    def __init__(self, client, ttl=300, prefix="swapi:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value):
+        self.client.setex(self.prefix + key, self.ttl, json.dumps(value))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        # every key under the prefix, with SCAN so the server isn't blocked like KEYS would
+        keys = []
+        for key in self.client.scan_iter(match=self.prefix + "*", count=CLEAR_BATCH):
+            keys.append(key)
+            if len(keys) >= CLEAR_BATCH:
+                self.client.delete(*keys)
+                keys = []
+        if keys:
+            self.client.delete(*keys)
+
+
+class ReadThroughCache:
+    """Local LRU in front of an optional shared backend, with hit/miss counters."""
+
+    def __init__(self, local, shared=None):
+        self.local = local
+        self.shared = shared
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        # += isn't atomic across the worker's threads
+        self._stats_lock = threading.Lock()
+
+    def get_or_load(self, key, loader):
+        value = self.lookup(key)
+        if value is None:
+            value = loader()
+            self.store(key, value)
+        return value
+
+    def lookup(self, key):
+        # lookup()/store() are get_or_load() split in two for async loaders
+        if not self.enabled:
+            return None
+        value = self.local.get(key)
+        if value is None and self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.local.set(key, value)
+        with self._stats_lock:
+            if value is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return value
+
+    def store(self, key, value):
+        # misses (None) are not cached, a new row must be visible right away
+        if value is not None and self.enabled:
+            self.local.set(key, value)
+            if self.shared is not None:
+                self.shared.set(key, value)
+
+    def invalidate(self, key):
+        self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(key)
+
+    def clear(self):
+        self.local.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def stats(self):
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "enabled": self.enabled,
+            "backend": "lru+shared" if self.shared is not None else "lru",
+            "size": len(self.local),
+            "maxsize": self.local.maxsize,
+            "ttl": self.local.ttl,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / total, 4) if total else 0.0
+        }
+
+
+entity_cache = ReadThroughCache(LRUCache())
+
+
+def setup_cache(app):
+    # ENTITY_CACHE=off disables it, ENTITY_CACHE_REDIS_URL adds the shared backend
+    app.config.setdefault('ENTITY_CACHE', os.getenv('ENTITY_CACHE', 'on'))
+    app.config.setdefault('ENTITY_CACHE_SIZE', int(os.getenv('ENTITY_CACHE_SIZE', 10000)))
+    app.config.setdefault('ENTITY_CACHE_TTL', int(os.getenv('ENTITY_CACHE_TTL', 300)))
+    app.config.setdefault('ENTITY_CACHE_REDIS_URL', os.getenv('ENTITY_CACHE_REDIS_URL'))
+
+    entity_cache.enabled = app.config['ENTITY_CACHE'] != 'off'
+    entity_cache.local = LRUCache(app.config['ENTITY_CACHE_SIZE'], app.config['ENTITY_CACHE_TTL'])
+    entity_cache.shared = None
+    if app.config['ENTITY_CACHE_REDIS_URL']:
+        if redis is None:
+            raise RuntimeError("ENTITY_CACHE_REDIS_URL is set but the redis package is not installed")
+        entity_cache.shared = SharedCache(redis.Redis.from_url(app.config['ENTITY_CACHE_REDIS_URL']),
+                                          ttl=app.config['ENTITY_CACHE_TTL'])
+
+
+def entity_key(model, entity_id):
+    return f"{model.__tablename__}:{entity_id}"
+
+
+def get_entity(model, entity_id, serialize):
+    """Serialized row for `model` by id, read through the entity cache."""
+
+    def load():
+        entity = db.session.get(model, entity_id)
+        return serialize(entity) if entity is not None else None
+
+    return entity_cache.get_or_load(entity_key(model, entity_id), load)
+
+
+def invalidate_entity(model, entity_id):
+    entity_cache.invalidate(entity_key(model, entity_id))
@@ -0,0 +1,108 @@
+import json
+import click
+from flask.cli import AppGroup
+from popularity import reconcile_favorite_counts
+from favorite_store import migrate_favorites, current_store, COPY_CHUNK_SIZE
+from favorite_documents import check_documents
+from favorites import bump_favorites_versions
+from seed import seed_catalog, seed_sample
+from backup import export_catalog, import_catalog, FORMATS, CHUNK_ROWS
+from resources import RESOURCES, RESOURCES_BY_NAME
+from models import db
+
+
+def echo_report(report):
+    # {table: {rows, seconds, rows_per_second}} as aligned lines and a total
+    rows = sum(table["rows"] for table in report.values())
+    seconds = sum(table["seconds"] for table in report.values())
+    for name, table in report.items():
+        click.echo(f"{name:20} {table['rows']:>10} rows {table['seconds']:>8.2f} s {table['rows_per_second']:>9} rows/s")
+    click.echo(f"{'total':20} {rows:>10} rows {seconds:>8.2f} s {round(rows / seconds) if seconds else rows:>9} rows/s")
+
+
+def setup_commands(app):
+    favorites_cli = AppGroup('favorites', help='Favorite counters and storage.')
+
+    @favorites_cli.command('reconcile')
+    @click.option('--type', 'types', multiple=True, type=click.Choice(list(RESOURCES_BY_NAME)),
+                  help='Only these types (default: all).')
+    @click.option('--fix', is_flag=True, help='Overwrite the wrong counters with the real count.')
+    def reconcile(types, fix):
+        """Recount favorites per entity and report counters that drifted."""
+        resources = [RESOURCES_BY_NAME[name] for name in types] or RESOURCES
+        report = {}
+        for resource in resources:
+            report[resource.plural] = reconcile_favorite_counts(resource, fix=fix)
+            db.session.commit()
+        click.echo(json.dumps(report, indent=2))
+        if not fix and any(result["drift"] for result in report.values()):
+            raise SystemExit(1)
+
+    @favorites_cli.command('migrate')
+    @click.option('--type', 'types', multiple=True, type=click.Choice(list(RESOURCES_BY_NAME)),
+                  help='Only these types (default: all).')
+    @click.option('--chunk-size', type=click.IntRange(min=1), default=COPY_CHUNK_SIZE, show_default=True,
+                  help='Rows copied per transaction.')
+    @click.option('--check', is_flag=True, help='Only compare the tables, exit 1 if they differ.')
+    def migrate(types, chunk_size, check):
+        """Copy the five favorite tables into `favorites` (see favorite_store.py)."""
+        if not check and current_store() == "unified":
+            # `favorites` is the only copy kept up to date: it would lose what was written since
+            raise click.ClickException("FAVORITES_STORE=unified: only --check can run, the copy would "
+                                       "overwrite the favorites table with the old tables")
+        resources = [RESOURCES_BY_NAME[name] for name in types] or RESOURCES
+        report = migrate_favorites(resources, chunk_size=chunk_size, check=check)
+        click.echo(json.dumps(report, indent=2))
+        if check and any(result["missing"] or result["extra"] for result in report.values()):
+            raise SystemExit(1)
+
+    @favorites_cli.command('bump-versions')
+    def bump_versions():
+        """Change every favorites ETag, after switching FAVORITES_STORE to or from unified."""
+        click.echo(json.dumps({"bumped": bump_favorites_versions()}, indent=2))
+
+    @favorites_cli.command('documents')
+    @click.option('--fix', is_flag=True, help='Delete the stale and wrong documents, the next read rebuilds them.')
+    def documents(fix):
+        """Compare the materialized favorites documents with the live tables."""
+        report = check_documents(fix=fix)
+        click.echo(json.dumps(report, indent=2))
+        if not fix and report["mismatched"]:
+            raise SystemExit(1)
+
+    app.cli.add_command(favorites_cli)
+
+    @app.cli.command('seed')
+    @click.option('--scale', type=click.IntRange(min=1), default=None,
+                  help='Synthetic rows per catalog table (default: only the sample rows, into empty tables).')
+    @click.option('--users', type=click.IntRange(min=1), default=None, help='Users to create (default: scale / 10).')
+    @click.option('--favorites', type=click.IntRange(min=0), default=None, help='Favorites per type (default: scale).')
+    @click.option('--seed', 'seed_value', type=int, default=0, help='Same seed, same rows.')
+    @click.option('--workers', type=click.IntRange(min=1), default=1, help='Processes generating the rows.')
+    def seed(scale, users, favorites, seed_value, workers):
+        """Fill the database for development, staging or load tests."""
+        if scale is None:
+            click.echo(json.dumps({"inserted": seed_sample()}, indent=2))
+            return
+        echo_report(seed_catalog(scale, users=users, favorites=favorites, seed=seed_value, workers=workers))
+
+    catalog_cli = AppGroup('catalog', help='Export and import of every table, ids included.')
+
+    @catalog_cli.command('export')
+    @click.argument('directory', type=click.Path(file_okay=False))
+    @click.option('--format', 'fmt', type=click.Choice(FORMATS), default='csv', show_default=True,
+                  help='arrow and parquet need pyarrow.')
+    @click.option('--chunk-rows', type=click.IntRange(min=1), default=CHUNK_ROWS, show_default=True,
+                  help='Rows per file (csv, ndjson) or per batch (arrow, parquet).')
+    def export(directory, fmt, chunk_rows):
+        """Dump every table to DIRECTORY."""
+        echo_report(export_catalog(directory, fmt, chunk_rows))
+
+    @catalog_cli.command('import')
+    @click.argument('directory', type=click.Path(exists=True, file_okay=False))
+    @click.option('--replace', is_flag=True, help='Delete the rows already in the tables first.')
+    def import_(directory, replace):
+        """Load an export from DIRECTORY, in one transaction."""
+        echo_report(import_catalog(directory, replace=replace))
+
+    app.cli.add_command(catalog_cli)
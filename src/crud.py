@@ -0,0 +1,133 @@
+from flask import request, jsonify
+from sqlalchemy.exc import IntegrityError
+from pagination import paginate, parse_int_arg
+from bulk import bulk_create, validate_item
+from cache import get_entity, invalidate_entity
+from etags import conditional, bump_version
+from favorites import add_favorite, remove_favorite, serialize_favorite_row
+from popularity import top_favorited, DEFAULT_TOP, MAX_TOP
+from serializers import row_encoder
+from resources import RESOURCES
+from models import db, User
+
+
+def list_view(resource):
+    @conditional(resource.plural)
+    def view():
+        return paginate(resource.model)
+    return view
+
+
+def detail_view(resource):
+    @conditional(resource.plural, cache_version=True)
+    def view(**kwargs):
+        entity = get_entity(resource.model, kwargs[resource.fk], resource.serialize)
+        if not entity:
+            return jsonify({"Error": f"{resource.singular} not found"}), 404
+
+        return jsonify(entity), 200
+    return view
+
+
+def top_view(resource):
+    def view():
+        limit = parse_int_arg('limit', default=DEFAULT_TOP, minimum=1, maximum=MAX_TOP)
+        columns, rows = top_favorited(resource, limit)
+        return jsonify(row_encoder(columns)(rows)), 200
+    return view
+
+
+def create_view(resource):
+    def view():
+        data = request.get_json(silent=True)
+        if data is None:
+            return jsonify({"Error": "data not found"}), 400
+
+        # the same rule as every item of POST /<resource>/bulk
+        error = validate_item(data, resource)
+        if error:
+            return jsonify({"Error": error}), 400
+
+        # only the model's own columns, missing ones are left empty
+        entity = resource.model(**{field: data.get(field) for field in resource.fields})
+
+        try:
+            db.session.add(entity)
+            bump_version(resource.plural)
+            db.session.commit()
+            invalidate_entity(resource.model, entity.id)
+            return jsonify(resource.serialize(entity)), 201
+        except IntegrityError as e:
+            db.session.rollback()
+            # the unique index on lower(name) is the duplicate check; every
+            # backend names the violated index in its message
+            if f"ix_{resource.plural}_name_lower" in str(e.orig):
+                return jsonify({"Error": f"the {resource.singular} is already in {resource.plural}"}), 400
+            return jsonify({"Error": str(e.orig)}), 400
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({"Error": str(e)}), 500
+    return view
+
+
+def bulk_view(resource):
+    def view():
+        return bulk_create(resource)
+    return view
+
+
+def add_favorite_view(resource):
+    def view(user_id, **kwargs):
+        entity_id = kwargs[resource.fk]
+
+        if not get_entity(User, user_id, User.serialize_user):
+            return jsonify({"Error": "user not found"}), 404
+
+        entity = get_entity(resource.model, entity_id, resource.serialize)
+        if not entity:
+            return jsonify({"Error": f"{resource.singular} not found"}), 404
+
+        try:
+            new_fav_id = add_favorite(resource, user_id, entity_id)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({"Error": str(e)}), 500
+
+        if new_fav_id is None:
+            return jsonify({"msg": f"this {resource.singular} is already in favorites"}), 200
+
+        return jsonify(serialize_favorite_row(
+            resource.singular, new_fav_id, user_id, entity_id, entity["name"])), 201
+    return view
+
+
+def delete_favorite_view(resource):
+    def view(user_id, **kwargs):
+        try:
+            deleted = remove_favorite(resource, user_id, kwargs[resource.fk])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({"Error": str(e)}), 500
+
+        if not deleted:
+            return jsonify({"Error": "favorite not found"}), 404
+
+        return jsonify({"msg": "successfully deleted"}), 200
+    return view
+
+
+def register_resources(app):
+    """Add the list/detail/top/create/bulk and favorite routes of every resource."""
+    for resource in RESOURCES:
+        plural, singular, fk = resource.plural, resource.singular, resource.fk
+        favorite_url = f'/users/<int:user_id>/favorites/{plural}/<int:{fk}>'
+
+        app.add_url_rule(f'/{plural}', f'get_{plural}', list_view(resource), methods=['GET'])
+        app.add_url_rule(f'/{plural}/<int:{fk}>', f'get_{singular}', detail_view(resource), methods=['GET'])
+        app.add_url_rule(f'/{plural}/top', f'get_top_{plural}', top_view(resource), methods=['GET'])
+        app.add_url_rule(f'/{plural}', f'create_{singular}', create_view(resource), methods=['POST'])
+        app.add_url_rule(f'/{plural}/bulk', f'create_{plural}_bulk', bulk_view(resource), methods=['POST'])
+        app.add_url_rule(favorite_url, f'add_{singular}_favorite', add_favorite_view(resource), methods=['POST'])
+        app.add_url_rule(favorite_url, f'delete_{singular}_favorite', delete_favorite_view(resource), methods=['DELETE'])
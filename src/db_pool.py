@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a free connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._stats_lock:
+                self.checkouts += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+
+
+def env_int(name, default):
+    return int(os.getenv(name, default))
+
+
+def engine_options(database_uri):
+    """SQLALCHEMY_ENGINE_OPTIONS for `database_uri`, overridable with DB_* env vars.
+
+    SQLite keeps SQLAlchemy's defaults; Postgres and MySQL get a bounded,
+    pre-pinged, recycled pool, a connect timeout and a per-statement timeout.
+    """
+    backend = make_url(database_uri).get_backend_name()
+    if backend == "sqlite":
+        return {}
+
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": env_int("DB_POOL_SIZE", 5),
+        "max_overflow": env_int("DB_MAX_OVERFLOW", 10),
+        "pool_timeout": env_int("DB_POOL_TIMEOUT", 10),
+        # below MySQL's wait_timeout and most proxies' idle timeouts
+        "pool_recycle": env_int("DB_POOL_RECYCLE", 1800),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() != "false",
+    }
+
+    connect_args = {}
+    # seconds; psycopg2 and the MySQL drivers both call it connect_timeout
+    connect_timeout = env_int("DB_CONNECT_TIMEOUT", 10)
+    if connect_timeout:
+        connect_args["connect_timeout"] = connect_timeout
+    statement_timeout = env_int("DB_STATEMENT_TIMEOUT_MS", 30000)
+    if statement_timeout:
+        if backend == "postgresql":
+            connect_args["options"] = f"-c statement_timeout={statement_timeout}"
+        elif backend == "mysql":
+            connect_args["init_command"] = f"SET SESSION max_execution_time={statement_timeout}"
+    if connect_args:
+        options["connect_args"] = connect_args
+
+    return options
+
+
+# driver of the async engine used by asgi.py for each backend
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg", "mysql": "aiomysql"}
+
+
+def async_database_url(database_uri):
+    url = make_url(database_uri)
+    return url.set(drivername=f"{url.get_backend_name()}+{ASYNC_DRIVERS[url.get_backend_name()]}")
+
+
+def async_engine_options(database_uri):
+    """engine_options() for create_async_engine(): same pool sizes and timeouts.
+
+    The asyncio engine brings its own pool class, and asyncpg takes the
+    connect timeout as `timeout` and the statement timeout as a server
+    setting instead of libpq options.
+    """
+    options = engine_options(database_uri)
+    options.pop("poolclass", None)
+    if make_url(database_uri).get_backend_name() == "postgresql":
+        connect_args = {}
+        connect_timeout = env_int("DB_CONNECT_TIMEOUT", 10)
+        if connect_timeout:
+            connect_args["timeout"] = connect_timeout
+        statement_timeout = env_int("DB_STATEMENT_TIMEOUT_MS", 30000)
+        if statement_timeout:
+            connect_args["server_settings"] = {"statement_timeout": str(statement_timeout)}
+        options["connect_args"] = connect_args
+    return options
+
+
+def pool_stats(engine):
+    pool = engine.pool
+    stats = {"pool": type(pool).__name__, "status": pool.status()}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        })
+    if isinstance(pool, InstrumentedQueuePool):
+        stats.update({
+            "checkouts": pool.checkouts,
+            "checkout_timeouts": pool.timeouts,
+            "wait_avg_ms": round(pool.wait_total / pool.checkouts * 1000, 3) if pool.checkouts else 0.0,
+            "wait_max_ms": round(pool.wait_max * 1000, 3),
+        })
+    return stats
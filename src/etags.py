@@ -0,0 +1,102 @@
+import os
+import zlib
+from functools import wraps
+from flask import request, make_response, current_app, g
+from sqlalchemy import select, update
+from utils import insert_ignore
+from cache import LRUCache
+from models import db, TableVersion
+
+DEFAULT_CACHE_CONTROL = "no-cache"
+
+
+def version_query(key):
+    return select(TableVersion.version).where(TableVersion.key == key)
+
+
+def get_version(key):
+    return db.session.execute(version_query(key)).scalar() or 0
+
+
+# versions the detail routes read, kept ETAG_VERSION_TTL seconds per worker
+# so a GET served from the entity cache runs no statement at all; a write
+# drops its key at once in its own worker, the other workers follow within
+# the TTL (their entity caches already lag as much)
+version_cache = LRUCache(maxsize=1000, ttl=1)
+
+
+def cached_version(key):
+    version = version_cache.get(key)
+    if version is None:
+        version = get_version(key)
+        version_cache.set(key, version)
+    return version
+
+
+def bump_version(key):
+    """Increment the version of `key` inside the current transaction.
+
+    Every write to a resource must call this before committing, so the
+    ETags of its list/detail endpoints change in every worker at once.
+    """
+    version_cache.delete(key)
+    stmt = update(TableVersion).where(TableVersion.key == key).values(version=TableVersion.version + 1)
+    if db.session.execute(stmt).rowcount == 0:
+        if insert_ignore(TableVersion, {"key": key, "version": 1}).rowcount == 0:
+            # another transaction created the row first
+            db.session.execute(stmt)
+
+
+def make_etag(key, version, variant=None):
+    # the same version gives different bodies for different query strings
+    # (pagination, fields, ndjson), so they are part of the tag
+    if variant is None:
+        variant = request.query_string + request.headers.get("Accept", "").encode()
+    return f"{key}.{version}.{zlib.crc32(variant):08x}"
+
+
+def setup_etags(app):
+    # CACHE_CONTROL_<RESOURCE>=... overrides the header for one resource,
+    # e.g. CACHE_CONTROL_PLANETS="public, max-age=60"
+    cache_control = {}
+    for name, value in os.environ.items():
+        if name.startswith("CACHE_CONTROL_"):
+            cache_control[name[len("CACHE_CONTROL_"):].lower()] = value
+    app.config.setdefault("CACHE_CONTROL", cache_control)
+    app.config.setdefault("CACHE_CONTROL_DEFAULT", DEFAULT_CACHE_CONTROL)
+    app.config.setdefault("ETAG_VERSION_TTL", float(os.getenv("ETAG_VERSION_TTL", 1)))
+    version_cache.ttl = app.config["ETAG_VERSION_TTL"]
+
+
+def conditional(resource, version_key=None, cache_version=False):
+    """Add an ETag and Cache-Control to a GET view and answer 304 on If-None-Match.
+
+    The ETag comes from the version of `version_key` (a string, or a function
+    of the view arguments), so a matching request never runs the view;
+    cache_version=True reads it through version_cache. The
+    view finds that version in g.etag_version. If-None-Match uses the weak
+    comparison (RFC 9110), so a tag a compressing proxy made weak still matches.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = version_key(**kwargs) if callable(version_key) else (version_key or resource)
+            g.etag_version = (cached_version if cache_version else get_version)(key)
+            etag = make_etag(key, g.etag_version)
+            cache_control = current_app.config["CACHE_CONTROL"].get(
+                resource, current_app.config["CACHE_CONTROL_DEFAULT"])
+
+            if request.if_none_match.contains_weak(etag):
+                response = make_response("", 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = cache_control
+            # JSON or NDJSON depending on Accept (pagination.wants_stream)
+            response.vary.add("Accept")
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,104 @@
+"""Materialized GET /users/<id>/favorites bodies, behind FAVORITES_DOCUMENTS=on.
+
+One row per user with the encoded response and the version of its ETag key
+(favorites:<id>, etags.py) it was built at. Every favorite write already
+bumps that version in its transaction, so a document is current exactly
+when its version is the one of the ETag: the writes never touch it, the
+first read after a change rebuilds and stores it and the reads after that
+send the stored bytes as they are.
+
+Entity names are part of the body; nothing in the API renames an entity,
+and `flask catalog import` bumps every version. `flask favorites documents`
+compares the stored documents with the live tables.
+"""
+import json
+from flask import current_app
+from sqlalchemy import select, update, delete
+from utils import insert_ignore_statement
+from favorites import load_user_favorites, favorites_version_key
+from models import db, FavoritesDocument, TableVersion
+
+CHECK_CHUNK_SIZE = 500
+MISMATCH_SAMPLE = 20
+
+
+def documents_enabled(app=None):
+    return (app or current_app).config["FAVORITES_DOCUMENTS"] == "on"
+
+
+def encode_document(app, favorites_by_type):
+    # the bytes jsonify() would send, debug indentation included
+    return app.json.response({"All my favorites": favorites_by_type}).get_data()
+
+
+def document_query(user_id):
+    return select(FavoritesDocument.version, FavoritesDocument.body).where(FavoritesDocument.user_id == user_id)
+
+
+def store_statements(dialect, user_id, version, body):
+    """UPDATE, then INSERT if it changed no row. A document built at an older
+    version (a slower concurrent read) never replaces a newer one."""
+    return (
+        update(FavoritesDocument)
+        .where(FavoritesDocument.user_id == user_id, FavoritesDocument.version < version)
+        .values(version=version, body=body),
+        insert_ignore_statement(dialect, FavoritesDocument, {"user_id": user_id, "version": version, "body": body}),
+    )
+
+
+def favorites_document(user_id, version):
+    """The body of GET /users/<id>/favorites at `version`, stored or rebuilt."""
+    row = db.session.execute(document_query(user_id)).first()
+    if row is not None and row.version == version:
+        return row.body
+
+    body = encode_document(current_app, load_user_favorites(user_id))
+    update_stmt, insert_stmt = store_statements(db.session.get_bind().dialect.name, user_id, version, body)
+    try:
+        if db.session.execute(update_stmt).rowcount == 0:
+            db.session.execute(insert_stmt)
+        db.session.commit()
+    except Exception:
+        # not stored, the next read tries again; this one still gets its body
+        db.session.rollback()
+    return body
+
+
+def check_documents(fix=False, chunk_size=CHECK_CHUNK_SIZE):
+    """Compare the stored documents at the current version with the live tables.
+
+    Documents at another version are counted as stale: they are never
+    served and get rebuilt on the next read. With fix=True the stale ones
+    and the ones that differ are deleted, so the next read rebuilds them
+    (a favorite written during the check can show as a mismatch, deleting
+    it is harmless).
+    """
+    report = {"documents": 0, "stale": 0, "mismatched": 0, "sample": []}
+    last = 0
+    while True:
+        rows = db.session.execute(
+            select(FavoritesDocument.user_id, FavoritesDocument.version, FavoritesDocument.body)
+            .where(FavoritesDocument.user_id > last).order_by(FavoritesDocument.user_id).limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        last = rows[-1].user_id
+        keys = {favorites_version_key(row.user_id): row.user_id for row in rows}
+        versions = {keys[key]: version for key, version in db.session.execute(
+            select(TableVersion.key, TableVersion.version).where(TableVersion.key.in_(keys)))}
+
+        stale, mismatched = [], []
+        for row in rows:
+            if row.version != versions.get(row.user_id, 0):
+                stale.append(row.user_id)
+            elif json.loads(row.body) != {"All my favorites": load_user_favorites(row.user_id)}:
+                mismatched.append(row.user_id)
+        report["documents"] += len(rows)
+        report["stale"] += len(stale)
+        report["mismatched"] += len(mismatched)
+        report["sample"] += mismatched[:MISMATCH_SAMPLE - len(report["sample"])]
+        if fix and (stale or mismatched):
+            db.session.execute(delete(FavoritesDocument).where(FavoritesDocument.user_id.in_(stale + mismatched)))
+        db.session.commit()
+    report["fixed"] = bool(fix and report["mismatched"])
+    return report
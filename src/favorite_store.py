@@ -0,0 +1,132 @@
+"""Where favorites are read and written: FAVORITES_STORE.
+
+    legacy    the five <type>_favorites tables (default)
+    dual      reads the five tables, writes both them and `favorites`
+    unified   the `favorites` table only
+
+Moving a live database to the unified table:
+
+    1. flask db upgrade                       creates `favorites`, empty
+    2. deploy with FAVORITES_STORE=dual       every write goes to both
+    3. flask favorites migrate                copies the old rows in chunks, then
+                                              fixes what changed during the copy
+    4. deploy with FAVORITES_STORE=unified    `flask favorites migrate --check` first
+    5. flask favorites bump-versions          right after the deploy
+
+The two stores number favorites independently, so every favorite id in
+GET /users/<id>/favorites changes at step 4. No favorite is written then,
+so step 5 bumps every favorites ETag version: until it runs, a client
+revalidating an older ETag (or a materialized document, FAVORITES_DOCUMENTS)
+still gets the old ids. The same goes for any switch back from unified.
+
+The five tables are left as they were at step 4, so going back to legacy
+after writes in unified mode loses them.
+"""
+import os
+import time
+from flask import current_app
+from sqlalchemy import select, delete, func, exists, literal, true
+from utils import insert_ignore
+from resources import RESOURCES
+from models import db, Favorite
+
+STORES = ("legacy", "dual", "unified")
+COPY_CHUNK_SIZE = 10000
+
+
+def store_setting():
+    store = os.getenv("FAVORITES_STORE", "legacy")
+    if store not in STORES:
+        raise ValueError(f"FAVORITES_STORE must be one of {', '.join(STORES)}, not {store!r}")
+    return store
+
+
+def current_store():
+    return current_app.config["FAVORITES_STORE"]
+
+
+class FavoriteTable:
+    """The favorites of one resource in one store: its own <type>_favorites
+    table, or its rows of the unified `favorites` table.
+
+    The queries in favorites.py and popularity.py are written against these
+    columns, so they run unchanged on both; the ids they return differ.
+    """
+
+    def __init__(self, resource, unified):
+        self.resource = resource
+        self.unified = unified
+        self.model = Favorite if unified else resource.favorite_model
+        self.id = self.model.id
+        self.user_id = self.model.user_id
+        self.entity_id = Favorite.entity_id if unified else getattr(self.model, resource.fk)
+        # true() disappears from the WHERE clauses it's and-ed into
+        self.where = Favorite.entity_type == resource.singular if unified else true()
+
+    def values(self, user_id, entity_id):
+        if self.unified:
+            return {"user_id": user_id, "entity_type": self.resource.singular, "entity_id": entity_id}
+        return {"user_id": user_id, self.resource.fk: entity_id}
+
+
+def read_table(resource, store=None):
+    return FavoriteTable(resource, (store or current_store()) == "unified")
+
+
+def write_tables(resource, store=None):
+    # the one read from first: its result (new id, rows deleted) is the one returned
+    store = store or current_store()
+    if store == "dual":
+        return [FavoriteTable(resource, False), FavoriteTable(resource, True)]
+    return [read_table(resource, store)]
+
+
+def copy_favorites(resource, chunk_size=COPY_CHUNK_SIZE):
+    """Copy the <type>_favorites rows into `favorites`, one transaction per
+    chunk of ids; rows already there are skipped. Returns the rows copied."""
+    legacy = FavoriteTable(resource, False)
+    last, copied = 0, 0
+    while True:
+        chunk = select(legacy.id).where(legacy.id > last).order_by(legacy.id).limit(chunk_size).subquery()
+        upper = db.session.execute(select(func.max(chunk.c.id))).scalar()
+        if upper is None:
+            return copied
+        rows = (select(legacy.user_id, literal(resource.singular), legacy.entity_id)
+                .where(legacy.id > last, legacy.id <= upper))
+        copied += insert_ignore(Favorite, rows, ["user_id", "entity_type", "entity_id"]).rowcount
+        db.session.commit()
+        last = upper
+
+
+def compare_favorites(resource, fix=False):
+    """Favorites of one type only in the old table (missing) or only in
+    `favorites` (extra); with fix=True `favorites` is made to match."""
+    legacy, unified = FavoriteTable(resource, False), FavoriteTable(resource, True)
+    in_unified = exists().where(unified.where, unified.user_id == legacy.user_id,
+                                unified.entity_id == legacy.entity_id)
+    in_legacy = exists().where(legacy.user_id == unified.user_id, legacy.entity_id == unified.entity_id)
+    missing = select(legacy.user_id, literal(resource.singular), legacy.entity_id).where(~in_unified)
+    extra = select(unified.id).where(unified.where, ~in_legacy)
+
+    result = {
+        "missing": db.session.execute(select(func.count()).select_from(missing.subquery())).scalar(),
+        "extra": db.session.execute(select(func.count()).select_from(extra.subquery())).scalar(),
+    }
+    if fix and result["missing"]:
+        insert_ignore(Favorite, missing, ["user_id", "entity_type", "entity_id"])
+    if fix and result["extra"]:
+        db.session.execute(delete(Favorite).where(unified.where, ~in_legacy))
+    db.session.commit()
+    return result
+
+
+def migrate_favorites(resources=RESOURCES, chunk_size=COPY_CHUNK_SIZE, check=False):
+    """copy_favorites() then compare_favorites(fix=True) per type, or only
+    the comparison with check=True. Returns a report per type."""
+    report = {}
+    for resource in resources:
+        started = time.perf_counter()
+        copied = 0 if check else copy_favorites(resource, chunk_size)
+        report[resource.plural] = {"copied": copied, **compare_favorites(resource, fix=not check),
+                                   "seconds": round(time.perf_counter() - started, 2)}
+    return report
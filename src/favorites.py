@@ -0,0 +1,195 @@
+from sqlalchemy import select, union_all, literal, insert, update, delete, and_, exists, cast, String
+from utils import APIException, insert_ignore
+from etags import bump_version
+from popularity import change_favorite_count, change_favorite_counts
+from favorite_store import read_table, write_tables
+from models import db, User, TableVersion
+from resources import RESOURCES
+
+
+def user_favorites_query(user_id, store=None):
+    # a single UNION ALL over the five favorite tables (or types of the
+    # unified one), each joined to its entity so the name comes back in the
+    # same row (no lazy load per favorite). `store` outside an app context
+    selects = []
+    for resource in RESOURCES:
+        table, entity_model = read_table(resource, store), resource.model
+        selects.append(
+            select(literal(resource.singular).label("type"),
+                   table.id.label("id"),
+                   table.user_id.label("user_id"),
+                   table.entity_id.label("entity_id"),
+                   entity_model.name.label("entity_name"))
+            .join(entity_model, entity_model.id == table.entity_id)
+            .where(table.where, table.user_id == user_id)
+        )
+    union = union_all(*selects).subquery()
+    return select(union).order_by(union.c.type, union.c.id)
+
+
+def load_user_favorites(user_id):
+    return group_favorites(db.session.execute(user_favorites_query(user_id)))
+
+
+def group_favorites(rows):
+    # rows of user_favorites_query() -> {"planets": [...], "people": [...], ...}
+    favorites_by_type = {resource.plural: [] for resource in RESOURCES}
+    keys = {resource.singular: resource.plural for resource in RESOURCES}
+
+    for row in rows:
+        favorites_by_type[keys[row.type]].append(serialize_favorite_row(
+            row.type, row.id, row.user_id, row.entity_id, row.entity_name))
+
+    return favorites_by_type
+
+
+def serialize_favorite_row(fav_type, fav_id, user_id, entity_id, entity_name):
+    # one favorite of GET /users/<id>/favorites, from the columns of a row
+    return {
+        "id": fav_id,
+        "user_id": user_id,
+        "type": fav_type,
+        f"{fav_type}_id": entity_id,
+        f"{fav_type}_name": entity_name
+    }
+
+
+def add_favorite(resource, user_id, entity_id):
+    # returns the id of the new favorite, or None if it was already there
+    table, *mirrors = write_tables(resource)
+    result = insert_ignore(table.model, table.values(user_id, entity_id))
+    if result.rowcount == 0:
+        return None
+    mirror_insert(mirrors, user_id, [entity_id])
+    bump_version(favorites_version_key(user_id))
+    change_favorite_count(resource, entity_id, 1)
+    return result.inserted_primary_key[0]
+
+
+def remove_favorite(resource, user_id, entity_id):
+    # a single DELETE, returns False if there was nothing to delete
+    table, *mirrors = write_tables(resource)
+    result = db.session.execute(
+        delete(table.model)
+        .where(table.where, table.user_id == user_id, table.entity_id == entity_id)
+    )
+    if result.rowcount == 0:
+        return False
+    mirror_delete(mirrors, user_id, [entity_id])
+    bump_version(favorites_version_key(user_id))
+    change_favorite_count(resource, entity_id, -1)
+    return True
+
+
+def add_favorites(user_id, ids_by_resource):
+    """Favorite many entities of several types in the current transaction.
+
+    Per type: one query for the entities and the favorites already there,
+    one executemany for the new ones and the counters in batch. Returns
+    {(resource, entity_id): (status, favorite or None)}, status being
+    added, exists or not_found.
+    """
+    results, added = {}, False
+    for resource, entity_ids in ids_by_resource.items():
+        (table, *mirrors), entity_model = write_tables(resource), resource.model
+        found = db.session.execute(
+            select(entity_model.id, entity_model.name, table.id.label("favorite_id"))
+            .outerjoin(table.model, and_(table.where, table.entity_id == entity_model.id,
+                                         table.user_id == user_id))
+            .where(entity_model.id.in_(entity_ids))
+        ).all()
+        names = {row.id: row.name for row in found}
+        new_ids = [row.id for row in found if row.favorite_id is None]
+        for entity_id in entity_ids:
+            if entity_id not in names:
+                results[resource, entity_id] = ("not_found", None)
+            elif entity_id not in new_ids:
+                results[resource, entity_id] = ("exists", None)
+        if not new_ids:
+            continue
+
+        # a concurrent request adding the same pair hits the unique index
+        # here (IntegrityError), the caller rolls everything back
+        db.session.execute(insert(table.model), [table.values(user_id, entity_id) for entity_id in new_ids])
+        mirror_insert(mirrors, user_id, new_ids)
+        favorite_ids = dict(db.session.execute(
+            select(table.entity_id, table.id)
+            .where(table.where, table.user_id == user_id, table.entity_id.in_(new_ids))
+        ).all())
+        for entity_id in new_ids:
+            results[resource, entity_id] = ("added", serialize_favorite_row(
+                resource.singular, favorite_ids[entity_id], user_id, entity_id, names[entity_id]))
+        change_favorite_counts(resource, new_ids, 1)
+        added = True
+
+    if added:
+        bump_version(favorites_version_key(user_id))
+    return results
+
+
+def remove_favorites(user_id, ids_by_resource):
+    """Unfavorite many entities of several types in the current transaction.
+
+    One DELETE per type; returns {(resource, entity_id): status}, status
+    being deleted or not_found.
+    """
+    results, deleted = {}, False
+    for resource, entity_ids in ids_by_resource.items():
+        table, *mirrors = write_tables(resource)
+        found = dict(db.session.execute(
+            select(table.entity_id, table.id)
+            .where(table.where, table.user_id == user_id, table.entity_id.in_(entity_ids))
+        ).all())
+        for entity_id in entity_ids:
+            results[resource, entity_id] = "deleted" if entity_id in found else "not_found"
+        if not found:
+            continue
+
+        result = db.session.execute(delete(table.model).where(table.id.in_(found.values())))
+        if result.rowcount != len(found):
+            # another request deleted some of them after our check
+            raise APIException("the favorites changed concurrently, retry the request", status_code=409)
+        mirror_delete(mirrors, user_id, found.keys())
+        change_favorite_counts(resource, found.keys(), -1)
+        deleted = True
+
+    if deleted:
+        bump_version(favorites_version_key(user_id))
+    return results
+
+
+def mirror_insert(mirrors, user_id, entity_ids):
+    # FAVORITES_STORE=dual: the same favorites into the other store, which
+    # may already have some of them while `flask favorites migrate` runs
+    for table in mirrors:
+        insert_ignore(table.model, [table.values(user_id, entity_id) for entity_id in entity_ids])
+
+
+def mirror_delete(mirrors, user_id, entity_ids):
+    for table in mirrors:
+        db.session.execute(
+            delete(table.model)
+            .where(table.where, table.user_id == user_id, table.entity_id.in_(list(entity_ids)))
+        )
+
+
+def favorites_version_key(user_id):
+    return f"favorites:{user_id}"
+
+
+def bump_favorites_versions():
+    """Bump the ETag version of every user's favorites, in one transaction.
+
+    For when the bodies change without a favorite write: switching the
+    read side of FAVORITES_STORE changes every favorite id. Users without a
+    version yet (never written through the API) get one, so no ETag or
+    materialized document from before stays valid. Returns the users bumped.
+    """
+    bumped = db.session.execute(
+        update(TableVersion).where(TableVersion.key.like(favorites_version_key("%")))
+        .values(version=TableVersion.version + 1)).rowcount
+    key = literal(favorites_version_key("")) + cast(User.id, String)
+    missing = select(key, literal(1)).where(~exists().where(TableVersion.key == key))
+    bumped += insert_ignore(TableVersion, missing, ["key", "version"]).rowcount
+    db.session.commit()
+    return bumped
@@ -0,0 +1,176 @@
+import json
+from functools import lru_cache
+from flask import request
+from sqlalchemy import Integer, Float, String, tuple_
+from utils import APIException
+
+# query parameters of the list endpoints that are not filters
+RESERVED_ARGS = ('after_id', 'after', 'limit', 'fields', 'stream', 'sort')
+MAX_IN_VALUES = 100
+
+NUMERIC_OPERATORS = ('eq', 'gt', 'gte', 'lt', 'lte', 'between', 'in')
+STRING_OPERATORS = ('eq', 'in')
+
+
+def parse_value(column, raw, name, kind="parameter"):
+    try:
+        if isinstance(column.type, Integer):
+            return int(raw)
+        if isinstance(column.type, Float):
+            return float(raw)
+    except ValueError:
+        raise APIException(f"the {kind} '{name}' must be a number", status_code=400)
+    return raw
+
+
+def parse_filters(model, args=None):
+    """(column, operator, value) from ?<column>=, ?<column>__<op>= on the model's own columns.
+
+    Numbers accept eq/gt/gte/lt/lte/between/in, text columns eq/in:
+    ?population__gt=1000000, ?gravity__between=0.5,1.5, ?class_name__in=a,b
+    """
+    columns = model.__table__.columns
+    filters = []
+    for name, raw in (request.args if args is None else args).items(multi=True):
+        if name in RESERVED_ARGS:
+            continue
+        field, _, operator = name.partition('__')
+        operator = operator or 'eq'
+        if field not in columns:
+            raise APIException(f"the filter '{field}' does not exist", status_code=400)
+        column = columns[field]
+
+        allowed = STRING_OPERATORS if isinstance(column.type, String) else NUMERIC_OPERATORS
+        if operator not in allowed:
+            raise APIException(f"the filter '{name}' is not supported", status_code=400)
+
+        if operator in ('between', 'in'):
+            value = [parse_value(column, item.strip(), name) for item in raw.split(',')]
+            if operator == 'between' and len(value) != 2:
+                raise APIException(f"the parameter '{name}' needs two values: min,max", status_code=400)
+            if len(value) > MAX_IN_VALUES:
+                raise APIException(f"the parameter '{name}' has too many values", status_code=400)
+        else:
+            value = parse_value(column, raw, name)
+        filters.append((column, operator, value))
+    return filters
+
+
+OPERATORS = {
+    'eq': lambda column, value: column == value,
+    'gt': lambda column, value: column > value,
+    'gte': lambda column, value: column >= value,
+    'lt': lambda column, value: column < value,
+    'lte': lambda column, value: column <= value,
+    'between': lambda column, value: column.between(*value),
+    'in': lambda column, value: column.in_(value),
+}
+
+
+def driving_column(model, filters, sort):
+    """The column whose (column, id) index the listing walks; id for the primary key."""
+    if sort is not None:
+        return sort.column
+    # an equality filter on an indexed column still returns rows in id order
+    sortable = sortable_columns(model.__table__)
+    for column, operator, _ in filters:
+        if operator == 'eq' and column.name in sortable:
+            return column
+    return model.__table__.columns['id']
+
+
+def filter_conditions(filters, driving):
+    # every other column goes through an expression (col + 0, col || ''), so
+    # the planner can't pick its index and sort the matches: the listing
+    # always walks the driving index, which already returns the right order
+    conditions = []
+    for column, operator, value in filters:
+        if column is not driving:
+            column = column.concat('') if isinstance(column.type, String) else column + 0
+        conditions.append(OPERATORS[operator](column, value))
+    return conditions
+
+
+@lru_cache(maxsize=None)
+def sortable_columns(table):
+    # only columns with a (column, id) index: ORDER BY column, id LIMIT n is
+    # then an index walk, never a sort of the whole table
+    names = {'id'}
+    for index in table.indexes:
+        columns = [column.name for column in index.columns]
+        if len(columns) == 2 and columns[1] == 'id':
+            names.add(columns[0])
+    return frozenset(names)
+
+
+class Sort:
+    """?sort=population / ?sort=-population on an indexed column.
+
+    Rows are ordered by (column, id), rows without a value come last. Pages
+    continue from a cursor made of the last row's value (JSON, `null` once
+    in the rows without a value) and id: ?after=<value>&after_id=<id>.
+    """
+
+    def __init__(self, model, column, descending, args):
+        self.model = model
+        self.column = column
+        self.descending = descending
+        self.args = args
+
+    def parse_cursor(self):
+        if 'after' not in self.args:
+            raise APIException("the parameter 'after' is required with 'after_id' and 'sort'", status_code=400)
+        try:
+            value = json.loads(self.args['after'])
+        except ValueError:
+            raise APIException("the parameter 'after' must be a JSON value", status_code=400)
+        expected = str if isinstance(self.column.type, String) else (int, float)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, expected)):
+            raise APIException("the parameter 'after' does not match the sort column", status_code=400)
+        return value
+
+    def statements(self, stmt, after_id=None):
+        """The statements to run in turn for the rest of the listing: the rows
+        with a value (from the cursor on), then the rows without one."""
+        column, id_column = self.column, self.model.id
+        if self.descending:
+            order = (column.desc(), id_column.desc())
+        else:
+            order = (column, id_column)
+        # NOT NULL columns (name, id) have no second part to run
+        if column.nullable:
+            with_value = stmt.where(column.isnot(None)).order_by(*order)
+            without_value = [stmt.where(column.is_(None)).order_by(order[1])]
+        else:
+            with_value, without_value = stmt.order_by(*order), []
+
+        if after_id is None:
+            return [with_value] + without_value
+
+        after = self.parse_cursor()
+        if after is None:
+            if not without_value:
+                raise APIException("the parameter 'after' can't be null for this sort", status_code=400)
+            # already past every row with a value
+            newer = id_column < after_id if self.descending else id_column > after_id
+            return [without_value[0].where(newer)]
+
+        key, cursor = tuple_(column, id_column), tuple_(after, after_id)
+        return [with_value.where(key < cursor if self.descending else key > cursor)] + without_value
+
+    def cursor_args(self, row):
+        return {'after': json.dumps(getattr(row, self.column.name)), 'after_id': row.id}
+
+
+def parse_sort(model, args=None):
+    args = request.args if args is None else args
+    raw = args.get('sort')
+    if not raw:
+        return None
+    descending = raw.startswith('-')
+    name = raw.lstrip('-')
+    sortable = sortable_columns(model.__table__)
+    if name not in sortable:
+        raise APIException(
+            f"the parameter 'sort' must be one of: {', '.join(sorted(sortable))}", status_code=400)
+    return Sort(model, model.__table__.columns[name], descending, args)
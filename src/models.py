@@ -1,5 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import String, Column, Integer, Float, ForeignKey
+from sqlalchemy import String, Column, Integer, Float, DateTime, LargeBinary, ForeignKey, Index, func
 from sqlalchemy.orm import relationship
 
 db = SQLAlchemy()
@@ -21,6 +21,8 @@ class User(db.Model):
     vehicle_favorites = relationship("VehicleFavorite", back_populates="user", cascade="all, delete-orphan")
     starship_favorites = relationship("StarshipFavorite", back_populates="user", cascade="all, delete-orphan")
     person_favorites = relationship("PersonFavorite", back_populates="user", cascade="all, delete-orphan")
+    favorites = relationship("Favorite", back_populates="user", cascade="all, delete-orphan")
+    favorites_document = relationship("FavoritesDocument", uselist=False, cascade="all, delete-orphan")
 
     def serialize_user(self):
         return {
@@ -42,18 +44,18 @@ class Planet(db.Model):
     terrain = Column(String(100))
     climate = Column(String(100))
 
-    favorites = relationship("PlanetFavorite", back_populates="planet", cascade="all, delete-orphan")
+    # case-insensitive unique name, also used for duplicate checks on insert
+    __table_args__ = (
+        Index("ix_planets_name_lower", func.lower(name), unique=True),
+        # (column, id) indexes: the sorts allowed on GET /planets, see filters.py
+        Index("ix_planets_name_id", "name", "id"),
+        Index("ix_planets_diameter_id", "diameter", "id"),
+        Index("ix_planets_gravity_id", "gravity", "id"),
+        Index("ix_planets_population_id", "population", "id"),
+        Index("ix_planets_climate_id", "climate", "id"),
+    )
 
-    def serialize_planet(self):
-        return {
-            "id": self.id,
-            "name": self.name,
-            "diameter": self.diameter,
-            "gravity": self.gravity,
-            "population": self.population,
-            "terrain": self.terrain,
-            "climate": self.climate
-        }
+    favorites = relationship("PlanetFavorite", back_populates="planet", cascade="all, delete-orphan")
 
 
 class Specie(db.Model):
@@ -66,18 +68,15 @@ class Specie(db.Model):
     language = Column(String(50))
     average_life = Column(Integer)
 
-    favorites = relationship("SpecieFavorite", back_populates="specie", cascade="all, delete-orphan")
+    __table_args__ = (
+        Index("ix_species_name_lower", func.lower(name), unique=True),
+        Index("ix_species_name_id", "name", "id"),
+        Index("ix_species_height_id", "height", "id"),
+        Index("ix_species_average_life_id", "average_life", "id"),
+        Index("ix_species_language_id", "language", "id"),
+    )
 
-    def serialize_specie(self):
-        return {
-            "id": self.id,
-            "name": self.name,
-            "hair_color": self.hair_color,
-            "height": self.height,
-            "skin_color": self.skin_color,
-            "language": self.language,
-            "average_life": self.average_life
-        }
+    favorites = relationship("SpecieFavorite", back_populates="specie", cascade="all, delete-orphan")
 
 
 class Vehicle(db.Model):
@@ -91,19 +90,16 @@ class Vehicle(db.Model):
     cargo_cap = Column(Integer)
     terrain = Column(String(50))
 
-    favorites = relationship("VehicleFavorite", back_populates="vehicle", cascade="all, delete-orphan")
+    __table_args__ = (
+        Index("ix_vehicles_name_lower", func.lower(name), unique=True),
+        Index("ix_vehicles_name_id", "name", "id"),
+        Index("ix_vehicles_crew_id", "crew", "id"),
+        Index("ix_vehicles_passengers_id", "passengers", "id"),
+        Index("ix_vehicles_cargo_cap_id", "cargo_cap", "id"),
+        Index("ix_vehicles_class_name_id", "class_name", "id"),
+    )
 
-    def serialize_vehicle(self):
-        return {
-            "id": self.id,
-            "name": self.name,
-            "consumable": self.consumable,
-            "crew": self.crew,
-            "passengers": self.passengers,
-            "class_name": self.class_name,
-            "cargo_cap": self.cargo_cap,
-            "terrain": self.terrain
-        }
+    favorites = relationship("VehicleFavorite", back_populates="vehicle", cascade="all, delete-orphan")
 
 
 class Starship(db.Model):
@@ -117,19 +113,17 @@ class Starship(db.Model):
     cargo_cap = Column(Integer)
     hyperdrive_rating = Column(Float)
 
-    favorites = relationship("StarshipFavorite", back_populates="starship", cascade="all, delete-orphan")
+    __table_args__ = (
+        Index("ix_starships_name_lower", func.lower(name), unique=True),
+        Index("ix_starships_name_id", "name", "id"),
+        Index("ix_starships_crew_id", "crew", "id"),
+        Index("ix_starships_passengers_id", "passengers", "id"),
+        Index("ix_starships_cargo_cap_id", "cargo_cap", "id"),
+        Index("ix_starships_hyperdrive_rating_id", "hyperdrive_rating", "id"),
+        Index("ix_starships_class_name_id", "class_name", "id"),
+    )
 
-    def serialize_starship(self):
-        return {
-            "id": self.id,
-            "name": self.name,
-            "consumable": self.consumable,
-            "crew": self.crew,
-            "passengers": self.passengers,
-            "class_name": self.class_name,
-            "cargo_cap": self.cargo_cap,
-            "hyperdrive_rating": self.hyperdrive_rating
-        }
+    favorites = relationship("StarshipFavorite", back_populates="starship", cascade="all, delete-orphan")
 
 
 class Person(db.Model):
@@ -142,24 +136,45 @@ class Person(db.Model):
     eye_color = Column(String(50))
     gender = Column(String(50))
 
+    __table_args__ = (
+        Index("ix_people_name_lower", func.lower(name), unique=True),
+        Index("ix_people_name_id", "name", "id"),
+        Index("ix_people_height_id", "height", "id"),
+        Index("ix_people_gender_id", "gender", "id"),
+    )
+
     favorites = relationship("PersonFavorite", back_populates="person", cascade="all, delete-orphan")
 
-    def serialize_person(self):
-        return {
-            "id": self.id,
-            "name": self.name,
-            "hair_color": self.hair_color,
-            "height": self.height,
-            "skin_color": self.skin_color,
-            "eye_color": self.eye_color,
-            "gender": self.gender
-        }
+
+# ----------------------------MODELOS DE TABLAS DE CONTROL----------------------------#
+
+class TableVersion(db.Model):
+    # bumped in the same transaction as every write, used to build ETags
+    __tablename__ = "table_versions"
+    key = Column(String(100), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class FavoriteCount(db.Model):
+    # favorites per entity, kept by add_favorite(s)/remove_favorite(s) and checked
+    # by `flask favorites reconcile`
+    __tablename__ = "favorite_counts"
+    __table_args__ = (
+        Index("ix_favorite_counts_type_count", "type", "count", "entity_id"),
+    )
+    type = Column(String(20), primary_key=True)
+    entity_id = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
 
 
 # ----------------------------MODELOS DE TABLAS DE FAVORITOS----------------------------#
 
 class PlanetFavorite(db.Model):
     __tablename__ = "planet_favorites"
+    __table_args__ = (
+        Index("ix_planet_favorites_user_id_planet_id", "user_id", "planet_id", unique=True),
+        Index("ix_planet_favorites_planet_id", "planet_id"),
+    )
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     planet_id = Column(Integer, ForeignKey("planets.id"), nullable=False)
@@ -167,18 +182,13 @@ class PlanetFavorite(db.Model):
     user = relationship("User", back_populates="planet_favorites")
     planet = relationship("Planet", back_populates="favorites")
 
-    def serialize_favorite(self):
-        return {
-            "id": self.id,
-            "user_id": self.user_id,
-            "type": "planet",
-            "planet_id": self.planet_id,
-            "planet_name": self.planet.name
-        }
-
 
 class SpecieFavorite(db.Model):
     __tablename__ = "specie_favorites"
+    __table_args__ = (
+        Index("ix_specie_favorites_user_id_specie_id", "user_id", "specie_id", unique=True),
+        Index("ix_specie_favorites_specie_id", "specie_id"),
+    )
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     specie_id = Column(Integer, ForeignKey("species.id"), nullable=False)
@@ -186,18 +196,13 @@ class SpecieFavorite(db.Model):
     user = relationship("User", back_populates="specie_favorites")
     specie = relationship("Specie", back_populates="favorites")
 
-    def serialize_favorite(self):
-        return {
-            "id": self.id,
-            "user_id": self.user_id,
-            "type": "specie",
-            "specie_id": self.specie_id,
-            "specie_name": self.specie.name
-        }
-
 
 class VehicleFavorite(db.Model):
     __tablename__ = "vehicle_favorites"
+    __table_args__ = (
+        Index("ix_vehicle_favorites_user_id_vehicle_id", "user_id", "vehicle_id", unique=True),
+        Index("ix_vehicle_favorites_vehicle_id", "vehicle_id"),
+    )
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     vehicle_id = Column(Integer, ForeignKey("vehicles.id"), nullable=False)
@@ -205,18 +210,13 @@ class VehicleFavorite(db.Model):
     user = relationship("User", back_populates="vehicle_favorites")
     vehicle = relationship("Vehicle", back_populates="favorites")
 
-    def serialize_favorite(self):
-        return {
-            "id": self.id,
-            "user_id": self.user_id,
-            "type": "vehicle",
-            "vehicle_id": self.vehicle_id,
-            "vehicle_name": self.vehicle.name
-        }
-
 
 class StarshipFavorite(db.Model):
     __tablename__ = "starship_favorites"
+    __table_args__ = (
+        Index("ix_starship_favorites_user_id_starship_id", "user_id", "starship_id", unique=True),
+        Index("ix_starship_favorites_starship_id", "starship_id"),
+    )
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     starship_id = Column(Integer, ForeignKey("starships.id"), nullable=False)
@@ -224,18 +224,13 @@ class StarshipFavorite(db.Model):
     user = relationship("User", back_populates="starship_favorites")
     starship = relationship("Starship", back_populates="favorites")
 
-    def serialize_favorite(self):
-        return {
-            "id": self.id,
-            "user_id": self.user_id,
-            "type": "starship",
-            "starship_id": self.starship_id,
-            "starship_name": self.starship.name
-        }
-
 
 class PersonFavorite(db.Model):
     __tablename__ = "person_favorites"
+    __table_args__ = (
+        Index("ix_person_favorites_user_id_person_id", "user_id", "person_id", unique=True),
+        Index("ix_person_favorites_person_id", "person_id"),
+    )
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     person_id = Column(Integer, ForeignKey("people.id"), nullable=False)
@@ -243,11 +238,33 @@ class PersonFavorite(db.Model):
     user = relationship("User", back_populates="person_favorites")
     person = relationship("Person", back_populates="favorites")
 
-    def serialize_favorite(self):
-        return {
-            "id": self.id,
-            "user_id": self.user_id,
-            "type": "person",
-            "person_id": self.person_id,
-            "person_name": self.person.name
-        }
\ No newline at end of file
+
+class Favorite(db.Model):
+    # every favorite type in one table, read and written instead of (or as
+    # well as) the five above depending on FAVORITES_STORE, see favorite_store.py.
+    # entity_id is a row of the table of entity_type, so it has no foreign key
+    __tablename__ = "favorites"
+    __table_args__ = (
+        # covering for a user's favorites (the id is in every index on SQLite
+        # and MySQL, INCLUDEd on Postgres), and the duplicate check
+        Index("ix_favorites_user_id_entity_type_entity_id", "user_id", "entity_type", "entity_id",
+              unique=True, postgresql_include=["id"]),
+        Index("ix_favorites_entity_type_entity_id", "entity_type", "entity_id"),
+    )
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    entity_type = Column(String(20), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    user = relationship("User", back_populates="favorites")
+
+
+class FavoritesDocument(db.Model):
+    # the encoded body of GET /users/<id>/favorites at one version of its
+    # ETag key, behind FAVORITES_DOCUMENTS=on, see favorite_documents.py
+    __tablename__ = "favorites_documents"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    version = Column(Integer, nullable=False)
+    # LONGBLOB on MySQL, a plain BLOB stops at 64 KB
+    body = Column(LargeBinary(length=2**32 - 1), nullable=False)
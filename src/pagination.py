@@ -0,0 +1,145 @@
+from urllib.parse import urlencode
+from flask import request, jsonify, url_for, Response, stream_with_context, current_app
+from sqlalchemy import select
+from utils import APIException
+from models import db
+from serializers import row_encoder
+from filters import parse_filters, parse_sort, driving_column, filter_conditions
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+STREAM_BATCH_SIZE = 1000
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def parse_int_arg(name, default=None, minimum=0, maximum=None, args=None):
+    # `args` is the query string as a MultiDict, Flask's request.args by default
+    value = (request.args if args is None else args).get(name)
+    if value is None or value == '':
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise APIException(f"the parameter '{name}' must be an integer", status_code=400)
+    if value < minimum or (maximum is not None and value > maximum):
+        raise APIException(f"the parameter '{name}' is out of range", status_code=400)
+    return value
+
+
+def parse_fields(model, args=None):
+    # ?fields=name,climate -> only those columns (the id is always included for the cursor)
+    columns = model.__table__.columns
+    raw = (request.args if args is None else args).get('fields')
+    if not raw:
+        return list(columns)
+
+    selected = [columns['id']]
+    for name in raw.split(','):
+        name = name.strip()
+        if not name or name == 'id':
+            continue
+        if name not in columns:
+            raise APIException(f"the field '{name}' does not exist", status_code=400)
+        if columns[name] not in selected:
+            selected.append(columns[name])
+    return selected
+
+
+def list_statements(model, columns, sort, args=None):
+    """The statements returning the filtered listing in order, run one after
+    the other (a sort has a second one for the rows without a value)."""
+    filters = parse_filters(model, args)
+    conditions = filter_conditions(filters, driving_column(model, filters, sort))
+    if sort is None:
+        after_id = parse_int_arg('after_id', default=0, args=args)
+        return [select(*columns).where(model.id > after_id, *conditions).order_by(model.id)]
+
+    # the sort column is needed for the cursor even when ?fields= leaves it
+    # out; row_encoder only zips the requested columns
+    selected = columns if sort.column in columns else columns + [sort.column]
+    return sort.statements(select(*selected).where(*conditions), parse_int_arg('after_id', default=None, args=args))
+
+
+def next_page_args(args, last_row, limit, sort):
+    # query arguments of the next page: the current ones with the cursor moved
+    args = args.to_dict()
+    args.update(after_id=last_row.id, limit=limit)
+    if sort is not None:
+        args.update(sort.cursor_args(last_row))
+    return args
+
+
+def next_cursor(last_row, sort):
+    # X-Next-Cursor: the last id, or with ?sort= the after and after_id
+    # arguments as a query string, since neither is a cursor alone
+    if sort is None:
+        return str(last_row.id)
+    return urlencode(sort.cursor_args(last_row))
+
+
+def paginate(model):
+    """Keyset pagination for list endpoints: ?after_id=&limit=&fields=&sort=
+
+    The body is still a plain JSON array; the cursor for the next page goes in
+    the `X-Next-Cursor` header (the value of ?after_id=, or with ?sort= the
+    `after=...&after_id=...` query arguments) and a `Link: <...>; rel="next"`
+    header with the whole URL.
+    Column filters and index-backed sorts are parsed by filters.py.
+    With `?stream=1` or `Accept: application/x-ndjson` the whole table is
+    streamed instead, see stream_ndjson().
+    """
+    if wants_stream():
+        return stream_ndjson(model)
+
+    limit = parse_int_arg('limit', default=DEFAULT_LIMIT, minimum=1, maximum=MAX_LIMIT)
+    columns = parse_fields(model)
+    sort = parse_sort(model)
+    statements = list_statements(model, columns, sort)
+
+    # one extra row tells us if there is a next page without a COUNT(*)
+    rows = []
+    for stmt in statements:
+        rows += db.session.execute(stmt.limit(limit + 1 - len(rows))).all()
+        if len(rows) > limit:
+            break
+
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    response = jsonify(row_encoder(columns)(rows))
+
+    if has_next:
+        next_url = url_for(request.endpoint, **request.view_args,
+                           **next_page_args(request.args, rows[-1], limit, sort))
+        response.headers['X-Next-Cursor'] = next_cursor(rows[-1], sort)
+        response.headers['Link'] = f'<{next_url}>; rel="next"'
+
+    return response, 200
+
+
+def wants_stream():
+    if request.args.get('stream') in ('1', 'true'):
+        return True
+    return request.accept_mimetypes.best == NDJSON_MIMETYPE
+
+
+def stream_ndjson(model):
+    """Stream every row (from ?after_id= on) as one JSON object per line.
+
+    Rows come from a server-side cursor in batches of STREAM_BATCH_SIZE, so
+    memory stays flat whatever the size of the table and the first line is
+    sent as soon as the first batch is fetched. Filters and sorts apply as
+    in paginate().
+    """
+    columns = parse_fields(model)
+    statements = list_statements(model, columns, parse_sort(model))
+
+    encode = row_encoder(columns)
+
+    def generate():
+        dumps = current_app.json.dumps
+        for stmt in statements:
+            stmt = stmt.execution_options(yield_per=STREAM_BATCH_SIZE)
+            for partition in db.session.execute(stmt).partitions():
+                yield "".join(dumps(item) + "\n" for item in encode(partition))
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE), 200
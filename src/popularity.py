@@ -0,0 +1,110 @@
+from sqlalchemy import select, update, delete, insert, func, exists, and_, literal, case
+from utils import insert_ignore
+from favorite_store import read_table
+from models import db, FavoriteCount
+
+DEFAULT_TOP = 10
+MAX_TOP = 100
+DRIFT_SAMPLE = 20
+
+
+def change_favorite_count(resource, entity_id, delta):
+    """Add `delta` to the favorite counter of an entity, in the current transaction."""
+    where = and_(FavoriteCount.type == resource.singular, FavoriteCount.entity_id == entity_id)
+    stmt = update(FavoriteCount).where(where).values(count=FavoriteCount.count + delta)
+    if db.session.execute(stmt).rowcount == 0:
+        values = {"type": resource.singular, "entity_id": entity_id, "count": max(delta, 0)}
+        if insert_ignore(FavoriteCount, values).rowcount == 0:
+            # another transaction created the row first
+            db.session.execute(stmt)
+
+
+def change_favorite_counts(resource, entity_ids, delta):
+    """change_favorite_count() for many entities, in a number of statements
+    that doesn't depend on how many: missing counters are created at 0
+    (ignoring the ones a concurrent transaction creates), then one UPDATE."""
+    entity_ids = set(entity_ids)
+    if not entity_ids:
+        return
+    where = and_(FavoriteCount.type == resource.singular, FavoriteCount.entity_id.in_(entity_ids))
+    missing = entity_ids - set(db.session.execute(select(FavoriteCount.entity_id).where(where)).scalars())
+    if missing:
+        insert_ignore(FavoriteCount, [{"type": resource.singular, "entity_id": entity_id, "count": 0}
+                                      for entity_id in missing])
+    count = FavoriteCount.count + delta
+    db.session.execute(update(FavoriteCount).where(where).values(count=case((count < 0, 0), else_=count)))
+
+
+def top_favorited_query(resource, limit):
+    # walks ix_favorite_counts_type_count backwards, joined to the entity
+    model = resource.model
+    columns = list(model.__table__.columns) + [FavoriteCount.count.label("favorites")]
+    stmt = (select(*columns)
+            .join(model, model.id == FavoriteCount.entity_id)
+            .where(FavoriteCount.type == resource.singular, FavoriteCount.count > 0)
+            .order_by(FavoriteCount.count.desc(), FavoriteCount.entity_id.desc())
+            .limit(limit))
+    return columns, stmt
+
+
+def top_favorited(resource, limit):
+    columns, stmt = top_favorited_query(resource, limit)
+    return columns, db.session.execute(stmt).all()
+
+
+def rebuild_favorite_counts(resource):
+    # recount a whole type in two statements, for rows inserted without add_favorite
+    table = read_table(resource)
+    db.session.execute(delete(FavoriteCount).where(FavoriteCount.type == resource.singular))
+    db.session.execute(insert(FavoriteCount).from_select(
+        ["type", "entity_id", "count"],
+        select(literal(resource.singular), table.entity_id, func.count())
+        .where(table.where).group_by(table.entity_id)))
+
+
+def reconcile_favorite_counts(resource, fix=False):
+    """Compare the counters of one type with COUNT(*) over its favorite table.
+
+    Returns how many counters were wrong and a sample of them; with fix=True
+    they are overwritten with the real count. Favorites added while this
+    runs can leave a new drift, which the next run corrects.
+    """
+    table = read_table(resource)
+    actual = (select(table.entity_id.label("entity_id"), func.count().label("actual"))
+              .where(table.where).group_by(table.entity_id).subquery())
+    stored = FavoriteCount.__table__
+
+    # entities with favorites whose counter is missing or different
+    missing_or_wrong = (
+        select(actual.c.entity_id, actual.c.actual, stored.c.count)
+        .outerjoin(stored, and_(stored.c.type == resource.singular,
+                                stored.c.entity_id == actual.c.entity_id))
+        .where(func.coalesce(stored.c.count, -1) != actual.c.actual)
+    )
+    # counters left above zero for entities without favorites
+    stale = (
+        select(stored.c.entity_id, stored.c.count)
+        .where(stored.c.type == resource.singular, stored.c.count != 0,
+               ~exists().where(table.where, table.entity_id == stored.c.entity_id))
+    )
+
+    drift = [(row.entity_id, row.count, row.actual) for row in db.session.execute(missing_or_wrong)]
+    drift += [(row.entity_id, row.count, 0) for row in db.session.execute(stale)]
+
+    if fix and drift:
+        for entity_id, stored_count, actual_count in drift:
+            if stored_count is None:
+                insert_ignore(FavoriteCount, {"type": resource.singular, "entity_id": entity_id,
+                                              "count": actual_count})
+            else:
+                db.session.execute(
+                    update(FavoriteCount)
+                    .where(FavoriteCount.type == resource.singular, FavoriteCount.entity_id == entity_id)
+                    .values(count=actual_count))
+
+    return {
+        "drift": len(drift),
+        "sample": [{"id": entity_id, "stored": stored_count, "actual": actual_count}
+                   for entity_id, stored_count, actual_count in drift[:DRIFT_SAMPLE]],
+        "fixed": bool(fix and drift),
+    }
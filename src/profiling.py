@@ -0,0 +1,139 @@
+import os
+import threading
+import time
+from flask import g, request, Response, has_app_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# request duration buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class RouteMetrics:
+    """Per-route histograms and counters, aggregated in-process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+
+    def observe(self, route, method, status, duration, db_time, queries, rows, over_budget):
+        with self.lock:
+            data = self.routes.setdefault((route, method), {
+                "buckets": [0] * len(BUCKETS),
+                "count": 0,
+                "sum": 0.0,
+                "db_seconds": 0.0,
+                "queries": 0,
+                "rows": 0,
+                "over_budget": 0,
+                "errors": 0,
+            })
+            for i, bound in enumerate(BUCKETS):
+                if duration <= bound:
+                    data["buckets"][i] += 1
+            data["count"] += 1
+            data["sum"] += duration
+            data["db_seconds"] += db_time
+            data["queries"] += queries
+            data["rows"] += rows
+            data["over_budget"] += int(over_budget)
+            data["errors"] += int(status >= 500)
+
+    def render(self):
+        lines = [
+            "# HELP http_request_duration_seconds Wall time per request.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        counters = {
+            "http_request_db_seconds_total": ("db_seconds", "Time spent in SQL statements."),
+            "http_request_sql_queries_total": ("queries", "SQL statements executed."),
+            "http_request_rows_fetched_total": ("rows", "Rows reported by the DB driver."),
+            "http_request_query_budget_exceeded_total": ("over_budget", "Requests over QUERY_BUDGET statements."),
+            "http_request_errors_total": ("errors", "Requests answered with a 5xx status."),
+        }
+        with self.lock:
+            routes = sorted(self.routes.items())
+            for (route, method), data in routes:
+                labels = f'route="{route}",method="{method}"'
+                for bound, value in zip(BUCKETS, data["buckets"]):
+                    lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {value}')
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {data["count"]}')
+                lines.append(f'http_request_duration_seconds_sum{{{labels}}} {data["sum"]:.6f}')
+                lines.append(f'http_request_duration_seconds_count{{{labels}}} {data["count"]}')
+            for name, (field, help_text) in counters.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for (route, method), data in routes:
+                    lines.append(f'{name}{{route="{route}",method="{method}"}} {data[field]}')
+        return "\n".join(lines) + "\n"
+
+
+metrics = RouteMetrics()
+
+
+def current_profile():
+    if not has_app_context():
+        return None
+    return g.get("_profile")
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile()
+    if profile is not None:
+        profile["statement_started"] = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile()
+    if profile is None or "statement_started" not in profile:
+        return
+    profile["db_time"] += time.perf_counter() - profile.pop("statement_started")
+    profile["queries"] += 1
+    # drivers report -1 when they don't know (e.g. SELECT on sqlite)
+    if cursor.rowcount and cursor.rowcount > 0:
+        profile["rows"] += cursor.rowcount
+
+
+def setup_profiling(app):
+    """Opt-in request profiling, enabled with PROFILING=on.
+
+    Every response gets a Server-Timing header with wall time, DB time and
+    number of SQL statements; per-route histograms are served on /metrics in
+    Prometheus text format. Requests that run more than QUERY_BUDGET
+    statements are logged and counted, so N+1 regressions show up.
+    """
+    app.config.setdefault('PROFILING', os.getenv('PROFILING', 'off'))
+    app.config.setdefault('QUERY_BUDGET', int(os.getenv('QUERY_BUDGET', 10)))
+    if app.config['PROFILING'] != 'on':
+        return
+
+    event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", after_cursor_execute)
+
+    @app.before_request
+    def start_profile():
+        g._profile = {"started": time.perf_counter(), "db_time": 0.0, "queries": 0, "rows": 0}
+
+    @app.after_request
+    def finish_profile(response):
+        profile = g.pop("_profile", None)
+        if profile is None:
+            return response
+
+        duration = time.perf_counter() - profile["started"]
+        route = request.url_rule.endpoint if request.url_rule else "not_found"
+        over_budget = profile["queries"] > app.config['QUERY_BUDGET']
+        if over_budget:
+            app.logger.warning("%s %s ran %d SQL statements (budget %d)", request.method,
+                               request.path, profile["queries"], app.config['QUERY_BUDGET'])
+
+        metrics.observe(route, request.method, response.status_code, duration,
+                        profile["db_time"], profile["queries"], profile["rows"], over_budget)
+        response.headers.add("Server-Timing", f"app;dur={duration * 1000:.2f}")
+        response.headers.add("Server-Timing",
+                             f'db;dur={profile["db_time"] * 1000:.2f};desc="{profile["queries"]} queries"')
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    def get_metrics():
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,41 @@
+from sqlalchemy import String
+from models import Planet, Specie, Vehicle, Starship, Person
+from models import PlanetFavorite, SpecieFavorite, VehicleFavorite, StarshipFavorite, PersonFavorite
+
+
+class Resource:
+    """One Star Wars catalog entity: its model, URL names and favorite table.
+
+    Every route, serializer and favorite handler in crud.py is generated from
+    these declarations, so a fix made there applies to all five entities.
+    """
+
+    def __init__(self, model, plural, singular, favorite_model, facets=()):
+        self.model = model
+        self.plural = plural          # URL segment and list key: "planets"
+        self.singular = singular      # messages, endpoints and favorite type: "planet"
+        self.favorite_model = favorite_model
+        self.fk = f"{singular}_id"    # column in the favorite table and URL argument
+        self.fields = [column.name for column in model.__table__.columns if column.name != "id"]
+        # text columns go into the search index, facets are counted per value
+        self.searchable = [column.name for column in model.__table__.columns
+                           if isinstance(column.type, String)]
+        self.facets = list(facets)
+
+    @property
+    def table(self):
+        return self.model.__tablename__
+
+    def serialize(self, entity):
+        return {"id": entity.id, **{field: getattr(entity, field) for field in self.fields}}
+
+
+RESOURCES = [
+    Resource(Planet, "planets", "planet", PlanetFavorite, facets=["climate", "terrain"]),
+    Resource(Specie, "species", "specie", SpecieFavorite, facets=["language", "skin_color"]),
+    Resource(Vehicle, "vehicles", "vehicle", VehicleFavorite, facets=["class_name", "terrain"]),
+    Resource(Starship, "starships", "starship", StarshipFavorite, facets=["class_name"]),
+    Resource(Person, "people", "person", PersonFavorite, facets=["gender", "eye_color", "hair_color"]),
+]
+
+RESOURCES_BY_NAME = {resource.plural: resource for resource in RESOURCES}
@@ -0,0 +1,212 @@
+import re
+from collections import Counter
+from contextlib import contextmanager
+from flask import request, jsonify
+from sqlalchemy import sql, select, func, text, and_, or_
+from utils import APIException
+from pagination import parse_int_arg
+from filters import parse_value
+from serializers import row_encoder
+from resources import RESOURCES, RESOURCES_BY_NAME
+from models import db
+
+# on SQLite each catalog table has an external-content FTS5 table over its
+# text columns (planets -> planets_search), keyed by the entity id
+FTS_SUFFIX = "_search"
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+FACET_LIMIT = 20
+FACET_SCAN = 10000
+
+_fts_available = {}
+
+
+def pg_document(resource):
+    # must match the expression of the GIN index created by the migration
+    parts = " || ' ' || ".join(f"coalesce({column}, '')" for column in resource.searchable)
+    return f"to_tsvector('simple', {parts})"
+
+
+def fts_table(resource):
+    return resource.table + FTS_SUFFIX
+
+
+def insert_trigger_ddl(resource):
+    columns = ", ".join(resource.searchable)
+    new = ", ".join(f"new.{column}" for column in resource.searchable)
+    insert = f"INSERT INTO {fts_table(resource)}(rowid, {columns}) VALUES (new.id, {new});"
+    return f"CREATE TRIGGER IF NOT EXISTS {resource.table}_search_insert AFTER INSERT ON {resource.table} BEGIN {insert} END"
+
+
+def search_index_ddl(dialect):
+    """Statements creating the search index for `dialect` (idempotent), the
+    ones migration c3d9e0a51b7f runs."""
+    statements = []
+    if dialect == "sqlite":
+        for resource in RESOURCES:
+            table, fts = resource.table, fts_table(resource)
+            columns = ", ".join(resource.searchable)
+            new = ", ".join(f"new.{column}" for column in resource.searchable)
+            old = ", ".join(f"old.{column}" for column in resource.searchable)
+            delete = f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old});"
+            insert = f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new});"
+            statements += [
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({columns}, "
+                f"content='{table}', content_rowid='id', prefix='2 3 4')",
+                insert_trigger_ddl(resource),
+                f"CREATE TRIGGER IF NOT EXISTS {table}_search_update AFTER UPDATE ON {table} BEGIN {delete} {insert} END",
+                f"CREATE TRIGGER IF NOT EXISTS {table}_search_delete AFTER DELETE ON {table} BEGIN {delete} END",
+                # index the rows that were there before the triggers
+                f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+            ]
+    elif dialect == "postgresql":
+        for resource in RESOURCES:
+            table = resource.table
+            statements.append(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_search ON {table} USING gin (({pg_document(resource)}))")
+    return statements
+
+
+def create_search_index(engine):
+    # for databases made with db.create_all() instead of the migrations
+    with engine.begin() as connection:
+        for statement in search_index_ddl(engine.dialect.name):
+            connection.execute(text(statement))
+    _fts_available.clear()
+
+
+@contextmanager
+def bulk_insert_search_index(connection, resource, first_id):
+    """Index the rows inserted in the block (ids from `first_id` on) with
+    one statement at the end instead of the insert trigger, row by row.
+
+    SQLite only, elsewhere the index follows by itself. The trigger is
+    dropped and recreated in the caller's transaction, so other writers
+    never run without it.
+    """
+    if connection.dialect.name != "sqlite":
+        yield
+        return
+    # looked up on the caller's connection: it may already hold SQLite's write lock
+    if connection.execute(text("SELECT 1 FROM sqlite_master WHERE name = :name"),
+                          {"name": fts_table(resource)}).first() is None:
+        yield
+        return
+    table, columns = resource.table, ", ".join(resource.searchable)
+    connection.execute(text(f"DROP TRIGGER IF EXISTS {table}_search_insert"))
+    yield
+    connection.execute(text(f"INSERT INTO {fts_table(resource)}(rowid, {columns}) "
+                            f"SELECT id, {columns} FROM {table} WHERE id >= :first_id"), {"first_id": first_id})
+    connection.execute(text(insert_trigger_ddl(resource)))
+
+
+def include_search_objects(object, name, type_, reflected, compare_to):
+    # keep alembic autogenerate from dropping the FTS5 tables and their shadow tables
+    return not (type_ == "table" and any(name.startswith(fts_table(resource)) for resource in RESOURCES))
+
+
+def has_fts(engine):
+    key = str(engine.url)
+    if key not in _fts_available:
+        with engine.connect() as connection:
+            _fts_available[key] = connection.execute(
+                text("SELECT 1 FROM sqlite_master WHERE name = :name"), {"name": fts_table(RESOURCES[0])}
+            ).first() is not None
+    return _fts_available[key]
+
+
+def tokenize(q):
+    return [token for token in re.split(r"\W+", q.lower()) if token]
+
+
+def text_match(resource, q):
+    """(from clause, where clause, order column) matching every word of `q`
+    as a prefix in the resource's text columns."""
+    model = resource.model
+    tokens = tokenize(q)
+    dialect = db.engine.dialect.name
+
+    if dialect == "sqlite" and has_fts(db.engine):
+        # whole words and the last one as a prefix (search as you type): a
+        # prefix on every word would merge the full doclist of each one.
+        # Quoted so user input can't inject FTS syntax
+        match = " ".join(f'"{token}"' for token in tokens[:-1]) + f' "{tokens[-1]}"*'
+        fts = sql.table(fts_table(resource), sql.column("rowid"))
+        # the join starts from the index and walks it in rowid (= id) order,
+        # so LIMIT stops early
+        source = fts.join(model, model.id == fts.c.rowid)
+        where = text(f"{fts.name} MATCH :match").bindparams(match=match)
+        return source, where, fts.c.rowid
+
+    if dialect == "postgresql":
+        query = " & ".join(tokens[:-1] + [f"{tokens[-1]}:*"])
+        where = text(f"{pg_document(resource)} @@ to_tsquery('simple', :tsquery)").bindparams(tsquery=query)
+        return model, where, model.id
+
+    # no index available (MySQL, SQLite without FTS5): plain LIKE on every token
+    columns = [getattr(model, name) for name in resource.searchable]
+    where = and_(*[or_(*[func.lower(column).like(f"%{token}%") for column in columns])
+                   for token in tokens])
+    return model, where, model.id
+
+
+def search_resource(resource, q, filters, limit):
+    model = resource.model
+    table = model.__table__
+    conditions = [table.columns[field] == parse_value(table.columns[field], value, field)
+                  for field, value in filters.items()]
+    source, order = model, model.id
+    if q:
+        source, where, order = text_match(resource, q)
+        conditions.append(where)
+
+    columns = list(model.__table__.columns)
+    rows = db.session.execute(
+        select(*columns).select_from(source).where(*conditions).order_by(order).limit(limit)
+    ).all()
+
+    # facets and total come from one scan of the first FACET_SCAN matches:
+    # exact for selective queries, a bounded sample when half the catalog matches
+    facet_columns = [getattr(model, field) for field in resource.facets]
+    scanned = db.session.execute(
+        select(model.id, *facet_columns).select_from(source).where(*conditions).limit(FACET_SCAN)
+    ).all()
+    total = len(scanned)
+    facets = {}
+    for position, field in enumerate(resource.facets, start=1):
+        counts = Counter("" if row[position] is None else str(row[position]) for row in scanned)
+        facets[field] = dict(sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:FACET_LIMIT])
+
+    return {"total": total, "exact": total < FACET_SCAN, "results": row_encoder(columns)(rows), "facets": facets}
+
+
+def search():
+    """GET /search?q=&type=&<attribute>=&limit=
+
+    Text search over the catalog's text columns with facet counts, grouped
+    by type. `type` is a comma-separated list (planets,people...); attribute
+    filters such as climate=arid restrict the search to the types that have
+    that attribute. `total` and the facets stop counting at FACET_SCAN
+    matches (`exact` is false then).
+    """
+    q = request.args.get("q", "").strip()
+    limit = parse_int_arg("limit", default=DEFAULT_LIMIT, minimum=1, maximum=MAX_LIMIT)
+
+    names = [name.strip() for name in request.args.get("type", "").split(",") if name.strip()]
+    for name in names:
+        if name not in RESOURCES_BY_NAME:
+            raise APIException(f"the type '{name}' does not exist", status_code=400)
+    resources = [RESOURCES_BY_NAME[name] for name in names] or RESOURCES
+
+    filters = {key: value for key, value in request.args.items() if key not in ("q", "type", "limit")}
+    for key in filters:
+        if not any(key in resource.fields for resource in resources):
+            raise APIException(f"the filter '{key}' does not exist", status_code=400)
+    resources = [resource for resource in resources if all(key in resource.fields for key in filters)]
+
+    if q and not tokenize(q):
+        raise APIException("the parameter 'q' has no searchable words", status_code=400)
+
+    results = {resource.plural: search_resource(resource, q, filters, limit) for resource in resources}
+    return jsonify({"query": q, "filters": filters, "types": results}), 200
@@ -0,0 +1,231 @@
+"""Synthetic data for load tests and staging, behind `flask seed`.
+
+Every row is derived from --seed and its position only, so the same
+arguments give the same data however many --workers generate the chunks.
+Chunks are written with utils.bulk_insert: COPY on Postgres, multi-row
+INSERTs elsewhere.
+"""
+import multiprocessing
+import random
+import time
+from collections import deque
+from itertools import chain
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import Integer, Float, select, func
+from utils import bulk_insert, reset_id_sequence
+from models import db, User, Favorite
+from resources import RESOURCES
+from popularity import rebuild_favorite_counts
+from etags import bump_version
+from search import bulk_insert_search_index
+from favorite_store import current_store
+
+CHUNK_SIZE = 10000
+NULL_RATIO = 0.05
+
+NAMES = {
+    "planets": ["Tatooine", "Coruscant", "Hoth", "Endor", "Mustafar", "Naboo", "Dagobah", "Bespin", "Jakku", "Kashyyyk"],
+    "species": ["Human", "Wookiee", "Twi'lek", "Rodian", "Mon Calamari", "Jawa", "Ewok", "Hutt", "Zabrak", "Gungan"],
+    "vehicles": ["X-34", "AT-AT", "AT-ST", "Speeder Bike", "Sandcrawler", "Snowspeeder", "Skiff", "Cloud Car"],
+    "starships": ["X-wing", "Y-wing", "TIE Fighter", "Star Destroyer", "Corvette", "Slave", "Falcon", "Interceptor"],
+    "people": ["Skywalker", "Organa", "Solo", "Kenobi", "Amidala", "Fett", "Calrissian", "Andor", "Tano", "Windu"],
+}
+
+# values of the text columns, by column name
+VOCABULARY = {
+    "climate": ["arid", "temperate", "frozen", "tropical", "murky", "humid", "windy"],
+    "terrain": ["desert", "urban", "tundra", "forests", "volcanic", "swamp", "ocean", "mountains", "plains"],
+    "hair_color": ["black", "brown", "blond", "white", "red", "none", "varied"],
+    "skin_color": ["fair", "light", "dark", "green", "blue", "brown", "pale", "varied"],
+    "eye_color": ["blue", "brown", "yellow", "red", "black", "green", "hazel"],
+    "gender": ["male", "female", "n/a"],
+    "language": ["Galactic Basic", "Shyriiwook", "Huttese", "Rodese", "Ewokese", "Binary", "Gungan basic"],
+    "class_name": ["Starfighter", "Light Freighter", "Walker", "Speeder", "Capital Ship", "Patrol Ship", "Transport"],
+    "consumable": ["1 day", "2 days", "1 week", "1 month", "2 months", "1 year", "2 years"],
+}
+WORDS = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta"]
+
+# the rows src/ini.py used to insert, for `flask seed` without --scale
+SAMPLE = {
+    "planets": [
+        {"name": "Tatooine", "population": 200000, "climate": "arid", "terrain": "desert", "diameter": 10465, "gravity": 1.0},
+        {"name": "Coruscant", "population": 100000000, "climate": "temperate", "terrain": "urban", "diameter": 12240, "gravity": 1.0},
+        {"name": "Hoth", "population": 0, "climate": "frozen", "terrain": "tundra", "diameter": 7200, "gravity": 1.1},
+        {"name": "Endor", "population": 30000000, "climate": "temperate", "terrain": "forests, mountains", "diameter": 4900, "gravity": 0.85},
+        {"name": "Mustafar", "population": 20000, "climate": "hot", "terrain": "volcanic", "diameter": 4200, "gravity": 1.2},
+    ],
+    "species": [
+        {"name": "Human", "height": 1.75, "hair_color": "varied", "skin_color": "varied", "language": "Galactic Basic", "average_life": 100},
+        {"name": "Wookiee", "height": 2.2, "hair_color": "brown", "skin_color": "brown", "language": "Shyriiwook", "average_life": 400},
+        {"name": "Twi'lek", "height": 1.8, "hair_color": "varied", "skin_color": "blue, green, red, yellow", "language": "Twi'leki", "average_life": 85},
+        {"name": "Rodian", "height": 1.7, "hair_color": "none", "skin_color": "green", "language": "Rodese", "average_life": 70},
+        {"name": "Mon Calamari", "height": 1.6, "hair_color": "none", "skin_color": "orange, red", "language": "Mon Calamarian", "average_life": 80},
+    ],
+    "vehicles": [
+        {"name": "X-wing", "crew": 1, "passengers": 0, "class_name": "Starfighter", "cargo_cap": 110, "consumable": "1 week"},
+        {"name": "TIE Fighter", "crew": 1, "passengers": 0, "class_name": "Starfighter", "cargo_cap": 65, "consumable": "2 days"},
+        {"name": "Millennium Falcon", "crew": 4, "passengers": 6, "class_name": "Light Freighter", "cargo_cap": 100000, "consumable": "2 months"},
+        {"name": "AT-AT", "crew": 5, "passengers": 40, "class_name": "Walker", "cargo_cap": 1000, "consumable": "1 week"},
+        {"name": "Speeder Bike", "crew": 1, "passengers": 1, "class_name": "Speeder", "cargo_cap": 20, "consumable": "1 day"},
+    ],
+    "starships": [
+        {"name": "X-wing", "crew": 1, "passengers": 0, "class_name": "Starfighter", "cargo_cap": 110, "consumable": "1 week"},
+        {"name": "TIE Fighter", "crew": 1, "passengers": 0, "class_name": "Starfighter", "cargo_cap": 65, "consumable": "2 days"},
+        {"name": "Millennium Falcon", "crew": 4, "passengers": 6, "class_name": "Light Freighter", "cargo_cap": 100000, "consumable": "2 months"},
+        {"name": "Star Destroyer", "crew": 47060, "passengers": 0, "class_name": "Capital Ship", "cargo_cap": 36000000, "consumable": "2 years"},
+        {"name": "Slave I", "crew": 1, "passengers": 6, "class_name": "Patrol Ship", "cargo_cap": 70000, "consumable": "1 month"},
+    ],
+    "people": [
+        {"name": "Luke Skywalker", "height": 1.72, "hair_color": "Blond", "skin_color": "Fair", "eye_color": "Blue", "gender": "Male"},
+        {"name": "Darth Vader", "height": 2.03, "hair_color": "None", "skin_color": "Pale", "eye_color": "Yellow", "gender": "Male"},
+        {"name": "Leia Organa", "height": 1.50, "hair_color": "Brown", "skin_color": "Fair", "eye_color": "Brown", "gender": "Female"},
+        {"name": "Yoda", "height": 0.66, "hair_color": "White", "skin_color": "Green", "eye_color": "Brown", "gender": "Male"},
+        {"name": "Chewbacca", "height": 2.28, "hair_color": "Brown", "skin_color": "Brown", "eye_color": "Blue", "gender": "Male"},
+    ],
+}
+
+
+def fake_value(rng, column):
+    if column.nullable and rng.random() < NULL_RATIO:
+        return None
+    if isinstance(column.type, Integer):
+        return rng.randint(0, 1000000)
+    if isinstance(column.type, Float):
+        return round(rng.uniform(0.1, 5.0), 2)
+    return rng.choice(VOCABULARY.get(column.name, WORDS))
+
+
+# The generators run in the pool processes: plain arguments in, tuples
+# out, (start, stop) of the chunk last
+
+def catalog_rows(table_name, first_id, seed, start, stop):
+    table = db.metadata.tables[table_name]
+    columns = [column for column in table.columns if column.name not in ("id", "name")]
+    rng = random.Random(f"{seed}:{table_name}:{start}")
+    rows = []
+    for i in range(start, stop):
+        entity_id = first_id + i
+        # the id keeps the names unique (case-insensitive unique index)
+        name = f"{rng.choice(NAMES[table_name])} {entity_id}"
+        rows.append((entity_id, name, *[fake_value(rng, column) for column in columns]))
+    return rows
+
+
+def user_rows(table_name, first_id, seed, start, stop):
+    rows = []
+    for i in range(start, stop):
+        user_id = first_id + i
+        rows.append((user_id, f"seed-{user_id}", f"seed-{user_id}@example.com", f"seed-{seed}"))
+    return rows
+
+
+def favorite_rows(table_name, first_user, users, first_entity, entities, start, stop):
+    # (i % users, i // users) never repeats below users * entities; the
+    # per-user offset spreads each user's favorites over the catalog
+    rows = []
+    for i in range(start, stop):
+        user, position = i % users, i // users
+        rows.append((first_user + user, first_entity + (position + user * 7919) % entities))
+    return rows
+
+
+def unified_favorite_rows(entity_type, first_user, users, first_entity, entities, start, stop):
+    # favorite_rows() for the favorites table
+    return [(user_id, entity_type, entity_id)
+            for user_id, entity_id in favorite_rows(None, first_user, users, first_entity, entities, start, stop)]
+
+
+def generate(pool, workers, count, function, *args):
+    """Chunks of rows from `function`, in order, at most 2 * workers generated ahead."""
+    starts = range(0, count, CHUNK_SIZE)
+    if pool is None:
+        for start in starts:
+            yield function(*args, start, min(start + CHUNK_SIZE, count))
+        return
+    pending = deque()
+    for start in starts:
+        pending.append(pool.submit(function, *args, start, min(start + CHUNK_SIZE, count)))
+        if len(pending) >= 2 * workers:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def next_id(table):
+    return (db.session.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+
+def load(table, names, chunks, report, index=None):
+    # one transaction per table
+    started, count = time.perf_counter(), 0
+    connection = db.session.connection()
+    with index or nullcontext():
+        for rows in chunks:
+            bulk_insert(connection, table, names, rows)
+            count += len(rows)
+    if "id" in names:
+        reset_id_sequence(connection, table)
+    db.session.commit()
+    elapsed = time.perf_counter() - started
+    report[table.name] = {"rows": count, "seconds": round(elapsed, 2),
+                          "rows_per_second": round(count / elapsed) if elapsed else count}
+
+
+def seed_catalog(scale, users=None, favorites=None, seed=0, workers=1):
+    """Append `scale` rows to every catalog table, `users` users and
+    `favorites` favorites per type between them, and report rows/second
+    per table. Favorite counters and ETag versions are updated after."""
+    users = users if users is not None else max(1, scale // 10)
+    favorites = min(scale if favorites is None else favorites, users * scale)
+    report = {}
+    # spawned, not forked: the workers must not inherit the app's database connections
+    pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) if workers > 1 else None
+    try:
+        first_ids = {}
+        for resource in RESOURCES:
+            table = resource.model.__table__
+            names = ["id", "name"] + [column.name for column in table.columns if column.name not in ("id", "name")]
+            first_id = first_ids[resource.plural] = next_id(table)
+            load(table, names, generate(pool, workers, scale, catalog_rows, table.name, first_id, seed), report,
+                 bulk_insert_search_index(db.session.connection(), resource, first_id))
+
+        table = User.__table__
+        first_user = next_id(table)
+        load(table, ["id", "username", "email", "password"],
+             generate(pool, workers, users, user_rows, table.name, first_user, seed), report)
+
+        # into the tables FAVORITES_STORE writes
+        store = current_store()
+        if scale and store != "unified":
+            for resource in RESOURCES:
+                table = resource.favorite_model.__table__
+                load(table, ["user_id", resource.fk],
+                     generate(pool, workers, favorites, favorite_rows, table.name, first_user, users,
+                              first_ids[resource.plural], scale), report)
+        if scale and store != "legacy":
+            load(Favorite.__table__, ["user_id", "entity_type", "entity_id"],
+                 chain.from_iterable(generate(pool, workers, favorites, unified_favorite_rows, resource.singular,
+                                              first_user, users, first_ids[resource.plural], scale)
+                                     for resource in RESOURCES), report)
+        for resource in RESOURCES:
+            rebuild_favorite_counts(resource)
+            bump_version(resource.plural)
+        db.session.commit()
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return report
+
+
+def seed_sample():
+    """The handful of well-known rows of each catalog table, into empty tables only."""
+    inserted = {}
+    for resource in RESOURCES:
+        table = resource.model.__table__
+        if db.session.execute(select(table.c.id).limit(1)).first() is None:
+            db.session.execute(table.insert(), SAMPLE[resource.plural])
+            bump_version(resource.plural)
+            inserted[resource.plural] = len(SAMPLE[resource.plural])
+    db.session.commit()
+    return inserted
@@ -1,4 +1,10 @@
+import csv
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from flask import jsonify, url_for
+from sqlalchemy import insert, text
+from models import db
 
 class APIException(Exception):
     status_code = 400
@@ -15,23 +21,49 @@ class APIException(Exception):
         rv['message'] = self.message
         return rv
 
+def insert_ignore(model, values, columns=None):
+    """INSERT that silently skips rows hitting a unique index.
+
+    Uses ON CONFLICT DO NOTHING on Postgres/SQLite and INSERT IGNORE on MySQL,
+    so concurrent workers can't race between a duplicate check and the insert.
+    `values` is a row, a list of rows, or a SELECT filling `columns`.
+    """
+    dialect = db.session.get_bind().dialect.name
+    return db.session.execute(insert_ignore_statement(dialect, model, values, columns))
+
+def insert_ignore_statement(dialect, model, values, columns=None):
+    # insert_ignore() without a session, for the async engine of asgi.py.
+    # Dialect modules imported here, only the one of the database gets loaded
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        dialect_insert = insert
+    stmt = dialect_insert(model)
+    stmt = stmt.from_select(columns, values) if columns is not None else stmt.values(values)
+    if dialect in ("postgresql", "sqlite"):
+        return stmt.on_conflict_do_nothing()
+    return stmt.prefix_with("IGNORE")
+
 def has_no_empty_params(rule):
     defaults = rule.defaults if rule.defaults is not None else ()
     arguments = rule.arguments if rule.arguments is not None else ()
     return len(defaults) >= len(arguments)
 
-def generate_sitemap(app):
-    links = ['/admin/']
-    for rule in app.url_map.iter_rules():
-        # Filter out rules we can't navigate to in a browser
-        # and rules that require parameters
-        if "GET" in rule.methods and has_no_empty_params(rule):
-            url = url_for(rule.endpoint, **(rule.defaults or {}))
-            if "/admin/" not in url:
-                links.append(url)
+def build_sitemap(app):
+    links = ['/admin/'] if 'admin' in app.extensions else []
+    with app.test_request_context():
+        for rule in app.url_map.iter_rules():
+            # Filter out rules we can't navigate to in a browser
+            # and rules that require parameters
+            if "GET" in rule.methods and has_no_empty_params(rule):
+                url = url_for(rule.endpoint, **(rule.defaults or {}))
+                if "/admin/" not in url:
+                    links.append(url)
 
     links_html = "".join(["<li><a href='" + y + "'>" + y + "</a></li>" for y in links])
-    return """
+    html = """
         <div style="text-align: center;">
         <img style="max-height: 80px" src='https://storage.googleapis.com/breathecode/boilerplates/rigo-baby.jpeg' />
         <h1>Rigo welcomes you to your API!!</h1>
@@ -39,3 +71,65 @@ def generate_sitemap(app):
         <p>Start working on your proyect by following the <a href="https://start.4geeksacademy.com/starters/flask" target="_blank">Quick Start</a></p>
         <p>Remember to specify a real endpoint path like: </p>
         <ul style="text-align: left;">"""+links_html+"</ul></div>"
+    return {"html": html, "links": links}
+
+def get_sitemap(app):
+    # the url map doesn't change once the app is set up, so build it only once
+    if 'sitemap' not in app.extensions:
+        app.extensions['sitemap'] = build_sitemap(app)
+    return app.extensions['sitemap']
+
+def generate_sitemap(app):
+    return get_sitemap(app)["html"]
+
+_db_check_executor = ThreadPoolExecutor(max_workers=1)
+_db_check_lock = threading.Lock()
+_db_check = None
+
+def check_database(engine, timeout):
+    """True if `SELECT 1` answers within `timeout` seconds.
+
+    While a ping is still hanging no new one is queued behind it: the check
+    fails at once, and the first check after the hung ping returns pings again.
+    """
+    global _db_check
+
+    def ping():
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+    with _db_check_lock:
+        if _db_check is None or _db_check.done():
+            _db_check = _db_check_executor.submit(ping)
+        future = _db_check
+    try:
+        future.result(timeout=timeout)
+        return True
+    except Exception:
+        return False
+
+# NULL in the CSV that COPY reads and backup.py writes; empty strings stay empty
+CSV_NULL = "\\N"
+
+def copy_from_csv(connection, table, names, source):
+    """COPY `source` (CSV, no header, CSV_NULL for NULL) into `table`, psycopg2 only."""
+    cursor = connection.connection.driver_connection.cursor()
+    cursor.copy_expert(f"COPY {table.name} ({', '.join(names)}) FROM STDIN "
+                       f"WITH (FORMAT csv, NULL '{CSV_NULL}')", source)
+
+def bulk_insert(connection, table, names, rows):
+    """Insert tuples of `names` values: COPY on Postgres (psycopg2), Core
+    executemany elsewhere, which SQLAlchemy sends as multi-row INSERTs."""
+    if connection.dialect.name == "postgresql" and connection.dialect.driver == "psycopg2":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows([CSV_NULL if value is None else value for value in row] for row in rows)
+        buffer.seek(0)
+        copy_from_csv(connection, table, names, buffer)
+    else:
+        connection.execute(table.insert(), [dict(zip(names, row)) for row in rows])
+
+def reset_id_sequence(connection, table):
+    # after inserting explicit ids, move Postgres' sequence past them
+    if connection.dialect.name == "postgresql":
+        connection.execute(text(f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                                f"coalesce((SELECT max(id) FROM {table.name}), 0) + 1, false)"))
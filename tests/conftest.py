@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+from sqlalchemy import event
+
+# the app is loaded the way the benchmark scripts load it, and the tests
+# share their bounds
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+
+from common import load_app  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    """The Flask app on a throwaway SQLite file, tables created."""
+    return load_app()
+
+
+@pytest.fixture
+def statements(app):
+    """The SQL statements the app runs during the test, in order."""
+    from models import db
+    executed = []
+
+    def record(connection, cursor, statement, *args):
+        executed.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    yield executed
+    event.remove(engine, 'before_cursor_execute', record)
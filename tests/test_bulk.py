@@ -0,0 +1,42 @@
+"""POST /<resource>/bulk: per-item statuses."""
+
+
+def test_existing_non_ascii_name_is_a_duplicate(app):
+    client = app.test_client()
+    first = client.post('/planets/bulk', json=[{'name': 'Éadu'}, {'name': 'Ørsted'}])
+    assert first.status_code == 200
+    assert [item['status'] for item in first.json['items']] == ['created', 'created']
+    assert all(item['id'] for item in first.json['items'])
+
+    # the same names again, next to a new one: SQLite's lower() leaves É as
+    # it is, so the check has to compare names the way the unique index does
+    again = client.post('/planets/bulk', json=[{'name': 'Éadu'}, {'name': 'Ørsted'}, {'name': 'Jedha'}])
+    assert again.status_code == 200, again.json
+    assert [item['status'] for item in again.json['items']] == ['duplicate', 'duplicate', 'created']
+
+
+def test_duplicates_within_a_request(app):
+    response = app.test_client().post('/species/bulk', json=[{'name': 'Ewok'}, {'name': 'EWOK'}])
+    assert [item['status'] for item in response.json['items']] == ['created', 'duplicate']
+
+
+def test_fields_are_checked_against_their_column(app):
+    response = app.test_client().post('/planets/bulk', json=[
+        {'name': 'Crait', 'population': 'lots'},
+        {'name': 'Exegol', 'gravity': [1]},
+        {'name': 'Ahch-To', 'climate': 5},
+        {'name': 'Ajan Kloss', 'population': '42', 'gravity': 0.9},
+    ])
+    items = response.json['items']
+    assert [item['status'] for item in items] == ['invalid', 'invalid', 'invalid', 'created']
+    assert items[0]['Error'] == "the field 'population' must be a number"
+
+    created = app.test_client().get(f"/planets/{items[3]['id']}").json
+    assert (created['population'], created['gravity']) == (42, 0.9)
+
+
+def test_single_create_shares_the_rule(app):
+    client = app.test_client()
+    assert client.post('/planets', json={'name': 'Scarif', 'diameter': 'big'}).status_code == 400
+    assert client.post('/planets', json=5).status_code == 400
+    assert client.post('/planets', json={'name': 'Scarif', 'diameter': '7000'}).json['diameter'] == 7000
@@ -0,0 +1,58 @@
+"""The entity cache: LRU, shared backend and the read-through front."""
+import fnmatch
+
+import pytest
+
+
+class DictRedis:
+    """The part of the redis client SharedCache uses, on a dict."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def scan_iter(self, match, count=None):
+        return [key for key in list(self.data) if fnmatch.fnmatchcase(key, match)]
+
+
+@pytest.fixture
+def cache(app):
+    from cache import ReadThroughCache, LRUCache, SharedCache, CLEAR_BATCH
+    client = DictRedis()
+    client.data['other:1'] = 'kept'
+    cache = ReadThroughCache(LRUCache(), SharedCache(client))
+    for i in range(CLEAR_BATCH + 5):
+        cache.store(f'planets:{i}', {'id': i})
+    return cache
+
+
+def test_clear_empties_both_levels(cache):
+    cache.clear()
+    assert len(cache.local) == 0
+    assert cache.shared.client.data == {'other:1': 'kept'}
+    assert cache.lookup('planets:1') is None
+
+
+def test_counters_under_threads(app):
+    from concurrent.futures import ThreadPoolExecutor
+    from cache import ReadThroughCache, LRUCache
+    cache = ReadThroughCache(LRUCache())
+    cache.store('planets:1', {'id': 1})
+
+    def lookups(_):
+        for i in range(2000):
+            cache.lookup(f'planets:{i % 2}')
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lookups, range(8)))
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (8000, 8000)
@@ -0,0 +1,52 @@
+"""ETags and 304s of the cached GET routes, WSGI and ASGI."""
+import pytest
+
+
+@pytest.fixture(scope='module')
+def asgi_client(app):
+    from starlette.testclient import TestClient
+    import asgi
+    with TestClient(asgi.application) as client:
+        yield client
+
+
+@pytest.mark.parametrize('url', ['/planets', '/users/1/favorites'])
+def test_weak_etag_matches(app, url):
+    from models import db, User
+    with app.app_context():
+        if db.session.get(User, 1) is None:
+            db.session.add(User(id=1, username='etag', email='etag@example.com', password='x'))
+            db.session.commit()
+    client = app.test_client()
+    etag = client.get(url).headers['ETag']
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+    # what comes back through a proxy that compressed the response
+    assert client.get(url, headers={'If-None-Match': f'W/{etag}'}).status_code == 304
+
+
+def test_weak_etag_matches_asgi(app, asgi_client):
+    etag = asgi_client.get('/planets').headers['ETag']
+    assert asgi_client.get('/planets', headers={'If-None-Match': f'W/{etag}'}).status_code == 304
+
+
+def test_warm_detail_runs_no_statement(app, statements):
+    client = app.test_client()
+    planet = client.post('/planets', json={'name': 'Mustafar'}).json
+    url = f"/planets/{planet['id']}"
+    etag = client.get(url).headers['ETag']
+
+    statements.clear()
+    assert client.get(url).headers['ETag'] == etag
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+    assert statements == []
+
+    # a write drops the version in this worker right away
+    client.post('/planets', json={'name': 'Utapau'})
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_vary_accept(app, asgi_client):
+    etag = app.test_client().get('/planets').headers['ETag']
+    for client in (app.test_client(), asgi_client):
+        assert client.get('/planets').headers['Vary'] == 'Accept'
+        assert client.get('/planets', headers={'If-None-Match': etag}).headers['Vary'] == 'Accept'
@@ -0,0 +1,81 @@
+"""SQL statements per GET, batch POST and DELETE /users/<id>/favorites.
+
+The bounds are the ones of benchmarks/check_favorites_queries.py: they don't
+depend on how many favorites the user has.
+"""
+import itertools
+
+import pytest
+
+from check_favorites_queries import MAX_QUERIES, MAX_BATCH_QUERIES
+
+PER_TYPE = 50
+STORES = ('legacy', 'dual', 'unified')
+
+_usernames = itertools.count()
+
+
+@pytest.fixture(scope='module')
+def entities(app):
+    from models import db
+    from resources import RESOURCES
+    with app.app_context():
+        for resource in RESOURCES:
+            db.session.execute(resource.model.__table__.insert(),
+                               [{'name': f'{resource.table}-{i}'} for i in range(PER_TYPE)])
+        db.session.commit()
+
+
+def create_user(app, store):
+    """A new user with PER_TYPE favorites of every type in the tables of `store`."""
+    from models import db, User
+    from resources import RESOURCES
+    from favorite_store import write_tables
+    name = f'user-{next(_usernames)}'
+    with app.app_context():
+        user = User(username=name, email=f'{name}@example.com', password='x')
+        db.session.add(user)
+        db.session.flush()
+        for resource in RESOURCES:
+            for table in write_tables(resource, store):
+                db.session.execute(table.model.__table__.insert(),
+                                   [table.values(user.id, i + 1) for i in range(PER_TYPE)])
+        db.session.commit()
+        return user.id
+
+
+@pytest.mark.parametrize('documents', ('off', 'on'))
+@pytest.mark.parametrize('store', STORES)
+def test_get_favorites(app, entities, statements, monkeypatch, store, documents):
+    from resources import RESOURCES
+    monkeypatch.setitem(app.config, 'FAVORITES_STORE', store)
+    monkeypatch.setitem(app.config, 'FAVORITES_DOCUMENTS', documents)
+    user_id = create_user(app, store)
+    client = app.test_client()
+    # with documents on, the first read builds the document and the next ones serve it
+    first = client.get(f'/users/{user_id}/favorites')
+
+    statements.clear()
+    response = client.get(f'/users/{user_id}/favorites')
+
+    assert response.status_code == 200
+    assert response.data == first.data
+    assert sum(map(len, response.json['All my favorites'].values())) == PER_TYPE * len(RESOURCES)
+    assert len(statements) <= MAX_QUERIES, statements
+
+
+@pytest.mark.parametrize('store', STORES)
+def test_batch_favorites(app, entities, statements, monkeypatch, store):
+    from resources import RESOURCES
+    monkeypatch.setitem(app.config, 'FAVORITES_STORE', store)
+    user_id = create_user(app, store)
+    client = app.test_client()
+    items = [{'type': resource.singular, 'id': i + 1} for resource in RESOURCES for i in range(PER_TYPE)]
+
+    for method, status in (('DELETE', 'deleted'), ('POST', 'added')):
+        statements.clear()
+        response = client.open(f'/users/{user_id}/favorites', method=method, json=items)
+
+        assert response.status_code == 200, response.json
+        assert response.json[status] == len(items)
+        assert len(statements) <= MAX_BATCH_QUERIES, statements